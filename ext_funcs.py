@@ -1,4 +1,4 @@
-from typing import Sequence
+from typing import Sequence, Union
 from redminelib.resources import Issue
 
 
@@ -6,8 +6,10 @@ def choose_name(full_name: str, login_mm: str) -> str:
     return full_name if full_name else login_mm
 
 
-def sing_plur_tasks(seq: Sequence[Issue]) -> str:
-    return 'tasks' if len(seq) > 1 else 'task'
+def sing_plur_tasks(seq: Union[Sequence[Issue], int]) -> str:
+    # the issues or their count, a count doesn't need the issues to be downloaded
+    count = seq if isinstance(seq, int) else len(seq)
+    return 'tasks' if count > 1 else 'task'
 
 
 def create_full_name(first_name: str, last_name: str):
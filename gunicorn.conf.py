@@ -1,6 +1,7 @@
 import multiprocessing
 from wsgi.settings import envs
 
+# every worker builds the app, but only the one holding envs.WEBSOCKET_LOCK_FILE consumes the websocket
 #workers = multiprocessing.cpu_count() * 2 + 1
 bind = f"{envs.APP_HOST_INTERNAl}:{envs.APP_PORT_INTERNAL}"
 accesslog = '-'
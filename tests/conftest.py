@@ -4,7 +4,7 @@ from jinja2 import Environment, PackageLoader, select_autoescape
 from wsgi import create_app, settings
 from wsgi import my_bot
 from wsgi.redmine_api import (
-    create_redmine_user, create_redmine_project, create_project_memberships, all_roles, delete_redmine_project,
+    create_redmine_user, create_redmine_project, create_project_memberships_bulk, all_roles, delete_redmine_project,
     delete_redmine_user_by_username
 )
 
@@ -66,8 +66,10 @@ test_project_rm = create_redmine_project(
 )
 
 first_role = all_roles()[0]
-test_memberships1 = create_project_memberships(project_id='testing', user_id=test_rm_user1.id, role_ids=[first_role.id])
-test_memberships2 = create_project_memberships(project_id='testing', user_id=test_rm_user2.id, role_ids=[first_role.id])
+test_memberships1, test_memberships2 = create_project_memberships_bulk([
+    dict(project_id='testing', user_id=test_rm_user1.id, role_ids=[first_role.id]),
+    dict(project_id='testing', user_id=test_rm_user2.id, role_ids=[first_role.id]),
+])
 
 
 @pytest.fixture
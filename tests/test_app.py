@@ -789,6 +789,131 @@ class TestTasksForMe:
 
         assert response.json['type'] == 'ok'
 
+    @pytest.mark.parametrize('filters', (
+            {'status': {'label': 'open', 'value': 'open'}},
+            {'project': 'testing'},
+            {'due_after': date.today().strftime('%d.%m.%Y')},
+            {'due_after': date.today().strftime('%d.%m.%Y'),
+             'due_before': (date.today() + timedelta(days=7)).strftime('%d.%m.%Y')},
+            {'sort': {'label': 'due_date', 'value': 'due_date'}},
+    ))
+    def test_success_filters(self, client, filters):
+        data = {'context': {'acting_user': {'id': test_mm_user1['id'], 'username': test_mm_user1['username'],
+                                            'first_name': test_mm_user1['first_name'],
+                                            'last_name': test_mm_user1['last_name']}},
+                'values': filters}
+
+        with Redmine(envs.redmine_url_external, key=envs.rm_admin_key).session() as redmine:
+            issue = redmine.issue.create(project_id='testing', subject='subject', assigned_to_id=test_rm_user1.id,
+                                         due_date=date.today() + timedelta(days=1))
+
+            response = client.post(self.endpoint, json=data)
+
+            issue.delete()
+
+        assert response.json['type'] == 'ok'
+
+    def test_success_priority_filter(self, client):
+        with Redmine(envs.redmine_url_external, key=envs.rm_admin_key).session() as redmine:
+            issue = redmine.issue.create(project_id='testing', subject='subject', assigned_to_id=test_rm_user1.id)
+
+            data = {'context': {'acting_user': {'id': test_mm_user1['id'], 'username': test_mm_user1['username'],
+                                                'first_name': test_mm_user1['first_name'],
+                                                'last_name': test_mm_user1['last_name']}},
+                    'values': {'priority': issue.priority.name}}
+            response = client.post(self.endpoint, json=data)
+
+            issue.delete()
+
+        assert response.json['type'] == 'ok'
+
+    @pytest.mark.parametrize('filters', (
+            {'status': {'label': 'closed', 'value': 'closed'}},
+            {'due_before': (date.today() - timedelta(days=1)).strftime('%d.%m.%Y')},
+    ))
+    def test_filtered_out(self, client, filters):
+        data = {'context': {'acting_user': {'id': test_mm_user1['id'], 'username': test_mm_user1['username'],
+                                            'first_name': test_mm_user1['first_name'],
+                                            'last_name': test_mm_user1['last_name']}},
+                'values': filters}
+
+        with Redmine(envs.redmine_url_external, key=envs.rm_admin_key).session() as redmine:
+            issue = redmine.issue.create(project_id='testing', subject='subject', assigned_to_id=test_rm_user1.id,
+                                         due_date=date.today() + timedelta(days=1))
+
+            response = client.post(self.endpoint, json=data)
+
+            issue.delete()
+
+        full_name = create_full_name(test_mm_user1['first_name'], test_mm_user1['last_name'])
+        author = choose_name(full_name, test_mm_user1['username'])
+
+        assert response.json == views.no_tasks_for_you(author)
+
+    @pytest.mark.parametrize('name, value, text', (
+            ('status', {'label': 'done', 'value': 'done'}, 'done'),
+            ('priority', 'unknown priority', 'unknown priority'),
+            ('due_after', '31-12-2023', '31-12-2023'),
+            ('due_before', '32.12.2023', '32.12.2023'),
+            ('sort', {'label': 'name', 'value': 'name'}, 'name'),
+    ))
+    def test_invalid_filter(self, client, name, value, text):
+        data = {'context': {'acting_user': {'id': test_mm_user1['id'], 'username': test_mm_user1['username'],
+                                            'first_name': test_mm_user1['first_name'],
+                                            'last_name': test_mm_user1['last_name']}},
+                'values': {name: value}}
+
+        response = client.post(self.endpoint, json=data)
+
+        assert response.json == views.invalid_filter(name, text)
+
+    def test_unknown_project_filter(self, client):
+        data = {'context': {'acting_user': {'id': test_mm_user1['id'], 'username': test_mm_user1['username'],
+                                            'first_name': test_mm_user1['first_name'],
+                                            'last_name': test_mm_user1['last_name']}},
+                'values': {'project': 'unknown-project'}}
+
+        response = client.post(self.endpoint, json=data)
+
+        assert response.json == views.invalid_filter('project', 'unknown-project')
+
+    @pytest.mark.parametrize('page, expected_page, options', (
+            (None, 1, [{'label': 'Next page', 'value': '2'}]),
+            ({'label': 'Next page', 'value': '2'}, 2, [{'label': 'Previous page', 'value': '1'}]),
+            ({'label': 'Previous page', 'value': '1'}, 1, [{'label': 'Next page', 'value': '2'}]),
+            ('abc', 1, [{'label': 'Next page', 'value': '2'}]),
+            ({'label': 'Next page', 'value': '9'}, 2, [{'label': 'Previous page', 'value': '1'}]),
+    ))
+    def test_pages(self, client, monkeypatch, page, expected_page, options):
+        monkeypatch.setattr(envs, 'TASKS_PAGE_SIZE', 1)
+        # the due date filter leaves only the issues of this test on the pages
+        due_date = date.today() + timedelta(days=3650)
+        state = {'project': 'testing', 'due_after': due_date.strftime('%d.%m.%Y'),
+                 'due_before': due_date.strftime('%d.%m.%Y')}
+
+        data = {'context': {'acting_user': {'id': test_mm_user1['id'], 'username': test_mm_user1['username'],
+                                            'first_name': test_mm_user1['first_name'],
+                                            'last_name': test_mm_user1['last_name']}},
+                'values': {'page': page},
+                'state': state}
+
+        with Redmine(envs.redmine_url_external, key=envs.rm_admin_key).session() as redmine:
+            issues = [redmine.issue.create(project_id='testing', subject='subject', assigned_to_id=test_rm_user1.id,
+                                           due_date=due_date)
+                      for _ in range(2)]
+            try:
+                response = client.post(self.endpoint, json=data)
+            finally:
+                [i.delete() for i in issues]
+
+        form = response.json['form']
+        assert response.json['type'] == 'form'
+        assert form['title'] == f'Tasks assigned to me, page {expected_page} of 2'
+        assert form['submit']['path'] == self.endpoint
+        assert form['submit']['state'] == state
+        assert form['submit_buttons'] == 'page'
+        assert form['fields'][0]['options'] == options
+
     def test_no_rm_key(self, client):
         rm_admin_key = envs.rm_admin_key
         envs.rm_admin_key = None
@@ -880,6 +1005,111 @@ class TestTasksByMe:
         print(response.json)
         assert response.json['type'] == 'ok'
 
+    @pytest.mark.parametrize('filters', (
+            {'status': {'label': 'all', 'value': 'all'}},
+            {'project': 'testing'},
+            {'due_before': (date.today() + timedelta(days=7)).strftime('%d.%m.%Y')},
+            {'sort': {'label': 'created', 'value': 'created'}},
+    ))
+    def test_success_filters(self, client, filters):
+        data = {'context': {'acting_user': {'id': test_mm_user1['id'], 'username': test_mm_user1['username'],
+                                            'first_name': test_mm_user1['first_name'],
+                                            'last_name': test_mm_user1['last_name']}},
+                'values': filters}
+
+        with Redmine(envs.redmine_url_external, key=envs.rm_admin_key,
+                     impersonate=test_rm_user1.login).session() as redmine:
+            issue = redmine.issue.create(project_id='testing', subject='subject',
+                                         due_date=date.today() + timedelta(days=1))
+
+            response = client.post(self.endpoint, json=data)
+
+            issue.delete()
+
+        assert response.json['type'] == 'ok'
+
+    def test_filtered_out(self, client):
+        data = {'context': {'acting_user': {'id': test_mm_user1['id'], 'username': test_mm_user1['username'],
+                                            'first_name': test_mm_user1['first_name'],
+                                            'last_name': test_mm_user1['last_name']}},
+                'values': {'status': {'label': 'closed', 'value': 'closed'}}}
+
+        with Redmine(envs.redmine_url_external, key=envs.rm_admin_key,
+                     impersonate=test_rm_user1.login).session() as redmine:
+            issue = redmine.issue.create(project_id='testing', subject='subject')
+
+            response = client.post(self.endpoint, json=data)
+
+            issue.delete()
+
+        full_name = create_full_name(test_mm_user1['first_name'], test_mm_user1['last_name'])
+        author = choose_name(full_name, test_mm_user1['username'])
+
+        assert response.json == views.no_tasks_by_you(author)
+
+    @pytest.mark.parametrize('name, value, text', (
+            ('status', {'label': 'done', 'value': 'done'}, 'done'),
+            ('priority', 'unknown priority', 'unknown priority'),
+            ('due_after', '2023-12-31', '2023-12-31'),
+            ('sort', {'label': 'name', 'value': 'name'}, 'name'),
+    ))
+    def test_invalid_filter(self, client, name, value, text):
+        data = {'context': {'acting_user': {'id': test_mm_user1['id'], 'username': test_mm_user1['username'],
+                                            'first_name': test_mm_user1['first_name'],
+                                            'last_name': test_mm_user1['last_name']}},
+                'values': {name: value}}
+
+        response = client.post(self.endpoint, json=data)
+
+        assert response.json == views.invalid_filter(name, text)
+
+    def test_unknown_project_filter(self, client):
+        data = {'context': {'acting_user': {'id': test_mm_user1['id'], 'username': test_mm_user1['username'],
+                                            'first_name': test_mm_user1['first_name'],
+                                            'last_name': test_mm_user1['last_name']}},
+                'values': {'project': 'unknown-project'}}
+
+        response = client.post(self.endpoint, json=data)
+
+        assert response.json == views.invalid_filter('project', 'unknown-project')
+
+    @pytest.mark.parametrize('page, expected_page, options', (
+            (None, 1, [{'label': 'Next page', 'value': '2'}]),
+            ({'label': 'Next page', 'value': '2'}, 2, [{'label': 'Previous page', 'value': '1'}]),
+            ({'label': 'Previous page', 'value': '1'}, 1, [{'label': 'Next page', 'value': '2'}]),
+            ('abc', 1, [{'label': 'Next page', 'value': '2'}]),
+            ({'label': 'Next page', 'value': '9'}, 2, [{'label': 'Previous page', 'value': '1'}]),
+    ))
+    def test_pages(self, client, monkeypatch, page, expected_page, options):
+        monkeypatch.setattr(envs, 'TASKS_PAGE_SIZE', 1)
+        # the due date filter leaves only the issues of this test on the pages
+        due_date = date.today() + timedelta(days=3650)
+        state = {'project': 'testing', 'due_after': due_date.strftime('%d.%m.%Y'),
+                 'due_before': due_date.strftime('%d.%m.%Y')}
+
+        data = {'context': {'acting_user': {'id': test_mm_user1['id'], 'username': test_mm_user1['username'],
+                                            'first_name': test_mm_user1['first_name'],
+                                            'last_name': test_mm_user1['last_name']}},
+                'values': {'page': page},
+                'state': state}
+
+        with Redmine(envs.redmine_url_external, key=envs.rm_admin_key,
+                     impersonate=test_rm_user1.login).session() as redmine:
+            issues = [redmine.issue.create(project_id='testing', subject='subject', due_date=due_date)
+                      for _ in range(2)]
+            try:
+                response = client.post(self.endpoint, json=data)
+            finally:
+                [i.delete() for i in issues]
+
+        form = response.json['form']
+        assert response.json['type'] == 'form'
+        assert form['title'] == f'Tasks assigned by me, page {expected_page} of 2'
+        assert form['submit']['path'] == self.endpoint
+        assert form['submit']['state'] == state
+        assert form['submit_buttons'] == 'page'
+        assert form['fields'][0]['options'] == options
+
     @pytest.mark.parametrize('rm_user, mm_user', (
             (test_rm_user1, test_mm_user1),
             (test_rm_user2, test_mm_user2),
@@ -952,6 +1182,28 @@ class TestEventHandler:
         assert f'{envs.redmine_url_external}/issues/{issue.id}' in new_post['message']
         issue.delete()
 
+    @pytest.mark.parametrize('temp,expected', (
+            ('#t{id1} #t{id2}', '{url1} {url2}'),
+            ('  asdasd  #t{id2}    asda #t{id1} asdasd #t{id2} [#t{id1}]',
+             '  asdasd  {url2}    asda {url1} asdasd {url2} [#t{id1}]'),
+    ))
+    def test_success_many_links(self, app, temp, expected):
+        with app.app_context():
+            with Redmine(envs.redmine_url_external, key=envs.rm_admin_key,
+                         impersonate=test_rm_user1.login).session() as redmine:
+                issue1 = redmine.issue.create(project_id=test_project_rm.id, subject='subject1...')
+                issue2 = redmine.issue.create(project_id=test_project_rm.id, subject='subject2...')
+
+            new_post = blocks.block_3(temp.format(id1=issue1.id, id2=issue2.id), 2)
+
+        assert new_post['message'] == expected.format(
+            id1=issue1.id,
+            url1=f'{envs.redmine_url_external}/issues/{issue1.id}',
+            url2=f'{envs.redmine_url_external}/issues/{issue2.id}',
+        )
+        issue1.delete()
+        issue2.delete()
+
     @pytest.mark.parametrize('temp', (
             '#t{}',
             '  asdasd      #t{}    asda asdasd',
@@ -1052,3 +1304,8 @@ class TestOther:
     def test_correct_get_static(self, client):
         response = client.post('/bindings')
         assert response.json['data'][0]['bindings'][0]['icon'] == '{}/static/{}'.format(envs.app_url_external, 'redmine.png')
+
+    def test_metrics(self, client):
+        response = client.get('/metrics')
+        assert response.status_code == 200
+        assert {'counters', 'gauges', 'issue_visibility_cache'} <= response.json.keys()
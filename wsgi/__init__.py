@@ -1,20 +1,38 @@
 def create_app(test_config=None):
-    import logging, asyncio, os, textwrap, requests, json, re
+    import logging, asyncio, os, textwrap, requests, json, re, copy, math
     from flask import Flask, request, render_template, g, url_for
     from threading import Thread
+    from concurrent.futures import ThreadPoolExecutor
     from datetime import datetime, date
     from typing import Sequence
     from posixpath import join
-    from redminelib import Redmine
-    from redminelib.exceptions import ResourceNotFoundError, ForbiddenError, ImpersonateError, AuthError
+    from redminelib.exceptions import (
+        ResourceNotFoundError, ForbiddenError, ImpersonateError, AuthError, BaseRedmineError, ValidationError
+    )
 
     from ext_funcs import sing_plur_tasks, choose_name, create_full_name
     from wsgi.decorators import login_required
-    from wsgi import views
-    from wsgi.constants import EXPAND_DICT, OPTIONS_DONE_FOR_FORM
+    from wsgi import views, metrics
+    from wsgi.constants import (
+        EXPAND_DICT, OPTIONS_DONE_FOR_FORM, TASK_FILTER_FIELDS, TASK_STATUS_FILTERS, TASK_SORT_KEYS
+    )
     from wsgi.settings import envs
-    from wsgi.client_errors import ValidationDateError, ValidationTextError
-    from wsgi.my_bot import send_ephemeral_post, bot
+    from wsgi.client_errors import ValidationDateError, ValidationTextError, ValidationFilterError
+    from wsgi.my_bot import send_ephemeral_post_async, patch_post_async, get_posts_since, bot
+    from wsgi.websocket_consumer import wait_for_consumer_lock, EventQueue, PostCursor, raw_post_create_at
+    from wsgi.caches import TTLCache
+    from wsgi.redmine_session import redmine_client
+    from wsgi.redmine_async import AsyncRedmine
+    from wsgi.upstreams import UpstreamUnavailable
+    from wsgi.accounts import account_cache, cached_account, remember_account
+    from wsgi.metadata import redmine_metadata
+    from wsgi.projects import visible_projects, project_cache
+    from wsgi.memberships import is_project_member, membership_index, invalidate_memberships
+    from wsgi.users import find_user, user_directory, USER_STATUS_ACTIVE
+    from wsgi.issue_links import (
+        resolve_issues, find_issue_ids, rewrite_issue_links, issue_visibility_cache, ISSUE_NOT_FOUND, ISSUE_FORBIDDEN,
+        REDMINE_MAX_LIMIT
+    )
 
     if envs.DEBUG:
         logging.basicConfig(
@@ -25,56 +43,164 @@ def create_app(test_config=None):
 
     app = Flask(__name__, static_url_path='/static', static_folder='./static')
 
-    async def my_event_handler(message):
+    assignee_check_executor = ThreadPoolExecutor(
+        max_workers=envs.ASSIGNEE_CHECK_CONCURRENCY, thread_name_prefix='assignee_check'
+    )
+    issue_create_executor = ThreadPoolExecutor(
+        max_workers=envs.ISSUE_CREATE_CONCURRENCY, thread_name_prefix='issue_create'
+    )
+
+    async def on_websocket_event(message):
+        # cheap check of the raw event before decoding, most events are typing, statuses, reactions
+        # or posts without #t(id task) links. hello comes on every (re)connect and starts the catch-up.
+        # The context of a queued post is its create_at, the context of hello is where the catch-up starts
+        post_at = raw_post_create_at(message) if '"posted"' in message else None
+        if '"hello"' not in message and (post_at is None or '#t' not in message):
+            metrics.incr('websocket_events_skipped')
+            if post_at is not None:
+                # nothing to do in the post, the cursor passes it once the older queued posts are handled
+                websocket_post_cursor.handled(post_at, tracked=False)
+            return
+        metrics.incr('websocket_events_processed')
+        if post_at is not None:
+            websocket_post_cursor.track(post_at)
+            await websocket_event_queue.put(message, post_at)
+        else:
+            await websocket_event_queue.put(message, websocket_post_cursor.catch_up_start())
+
+    def on_websocket_event_dropped(message, context):
+        # the next catch-up fetches the dropped post, or repeats the dropped one
+        if isinstance(context, tuple):
+            since, generation = context
+            websocket_post_cursor.lost(since + 1, tracked=False)
+        else:
+            websocket_post_cursor.lost(context)
+
+    async def my_event_handler(message, context):
         load_message = json.loads(message)
         event = load_message.get('event', None)
         logging.info('my_event_handler: %s', event)
-        if event == 'posted':
+        if event == 'hello':
+            await catch_up_missed_posts(*context)
+        elif event == 'posted':
             data = load_message['data']
             post = json.loads(data['post'])
+            try:
+                await handle_post(post, data['sender_name'].removeprefix('@'))
+            except Exception:
+                websocket_post_cursor.lost(context)
+                raise
+            websocket_post_cursor.handled(context)
+
+    async def catch_up_missed_posts(since: int, generation: int):
+        # posts made while the websocket was disconnected never came as events, rewrite them now
+        loop = asyncio.get_running_loop()
+        posts = await loop.run_in_executor(None, get_posts_since, since)
+        if isinstance(posts, Exception):
+            return
+        logging.info('catch up %s posts since %s', len(posts), since)
+        metrics.incr('websocket_catch_up_posts', len(posts))
+
+        batch_size = envs.WEBSOCKET_CATCH_UP_BATCH_SIZE
+        for i in range(0, len(posts), batch_size):
+            batch = posts[i:i + batch_size]
+            results = await asyncio.gather(
+                *(handle_post(post, login_mm) for post, login_mm in batch), return_exceptions=True
+            )
+            for (post, login_mm), exp in zip(batch, results):
+                if isinstance(exp, Exception):
+                    logging.error('catch up failed', exc_info=exp)
+                    websocket_post_cursor.lost(post['create_at'], tracked=False)
+                else:
+                    websocket_post_cursor.handled(post['create_at'], tracked=False)
+        websocket_post_cursor.caught_up(generation)
+
+    async def handle_post(post: dict, login_mm: str):
+        get_msg = post['message']
+
+        # if not correct pattern #t(id task) then return
+        task_ids = find_issue_ids(get_msg)
+        if not task_ids:
+            return
+
+        # reconnects and the catch-up can deliver one post more than once. A post is seen once it was
+        # handled, one that failed is handled again when it comes again; in flight blocks the copies meanwhile
+        if seen_post_ids.get(post['id']) or post['id'] in posts_in_flight:
+            metrics.incr('websocket_posts_duplicate')
+            return
+        posts_in_flight.add(post['id'])
+        try:
+            await rewrite_post(post, login_mm, task_ids)
+        finally:
+            posts_in_flight.discard(post['id'])
+        seen_post_ids.set(post['id'], True)
+
+    def check_outbound(resp):
+        # the mattermost calls return their error, it fails the handling of the post
+        if isinstance(resp, Exception):
+            raise resp
+        return resp
+
+    async def rewrite_post(post: dict, login_mm: str, task_ids: list):
+        get_msg = post['message']
+        user_id = post['user_id']
+        post_id = post['id']
+        channel_id = post['channel_id']
+
+        # check exist login_redmine in config
+        login_rm = check_exist_login_redmine_in_config_file(login_mm)
+        if type(login_rm) is dict:
+            resp = check_outbound(await send_ephemeral_post_async(user_id, channel_id, login_rm['text']))
+            return
+
+        redmine = AsyncRedmine(login_rm)
+
+        # check have redmine account in redmine
+        rm_user = await check_exist_account_and_token_in_redmine_async(redmine, login_rm)
+        if type(rm_user) is dict:
+            resp = check_outbound(await send_ephemeral_post_async(user_id, channel_id, rm_user['text']))
+            return
+
+        tasks = await fetch_tasks(redmine, login_rm, task_ids)
+
+        for task_id in task_ids:
+            if tasks[task_id] == ISSUE_NOT_FOUND:
+                error_msg = f'# You have not task with ID `{task_id}`'
+                resp = check_outbound(await send_ephemeral_post_async(user_id, channel_id, error_msg))
+                return
+            elif tasks[task_id] == ISSUE_FORBIDDEN:
+                error_msg = f'# You haven\'t access to task with ID {task_id}'
+                resp = check_outbound(await send_ephemeral_post_async(user_id, channel_id, error_msg))
+                return
 
-            get_msg = post['message']
+        new_msg = rewrite_issue_links(get_msg, tasks, envs.redmine_url_external)
+        if new_msg != get_msg:
+            resp = check_outbound(await patch_post_async(post_id, new_msg))
 
-            # if not correct pattern #t(id task) then return
-            if re.search(r'#t(\d+)', get_msg) is None:
-                return
+    async def fetch_tasks(redmine, login_rm: str, task_ids: Sequence[int]) -> dict:
+        result = {}
+        for task_id in dict.fromkeys(task_ids):
+            status = issue_visibility_cache.get((login_rm, task_id))
+            if status is not None:
+                result[task_id] = status
+
+        missed_ids = [task_id for task_id in dict.fromkeys(task_ids) if task_id not in result]
+        if not missed_ids:
+            return result
 
-            login_mm = data['sender_name'].removeprefix('@')
-            user_id = post['user_id']
-            post_id = post['id']
-            channel_id = post['channel_id']
-            new_msg = post['message']
+        batch_size = min(envs.ISSUE_LOOKUP_BATCH_SIZE, REDMINE_MAX_LIMIT)
+        batches = [missed_ids[i:i + batch_size] for i in range(0, len(missed_ids), batch_size)]
 
-            # check exist login_redmine in config
-            login_rm = check_exist_login_redmine_in_config_file(login_mm)
-            if type(login_rm) is dict:
-                resp = send_ephemeral_post(user_id, channel_id, login_rm['text'])
-                return
+        async def resolve_batch(batch):
+            # the semaphore caps the lookups in flight for all posts together
+            async with issue_lookup_semaphore:
+                return await resolve_issues(redmine, batch)
 
-            with Redmine(envs.redmine_url_external, key=envs.rm_admin_key, impersonate=login_rm).session() as redmine:
-                # check have redmine account in redmine
-                rm_user = check_exist_account_and_token_in_redmine(redmine, login_mm)
-                if type(rm_user) is dict:
-                    resp = send_ephemeral_post(user_id, channel_id, rm_user['text'])
-                    return
-                for regex in re.finditer(r'#t(\d+)', get_msg):
-                    task_id = int(regex.group(1))
-                    try:
-                        task = redmine.issue.get(task_id)
-                    except ResourceNotFoundError:
-                        error_msg = f'# You have not task with ID `{task_id}`'
-                        resp = send_ephemeral_post(user_id, channel_id, error_msg)
-                        return
-                    except ForbiddenError:
-                        error_msg = f'# You haven\'t access to task with ID {task_id}'
-                        resp = send_ephemeral_post(user_id, channel_id, error_msg)
-                        return
-                    else:
-                        issue_link = f'{envs.redmine_url_external}/issues/{task_id}'
-                        new_msg = re.sub(fr'(?<!\[){regex.group(0)}', issue_link, new_msg, 1)
-
-            if new_msg != get_msg:
-                resp = bot.posts.patch_post(post_id=post_id, options={'id': post_id, 'message': new_msg})
+        for batch_result in await asyncio.gather(*(resolve_batch(batch) for batch in batches)):
+            for task_id, status in batch_result.items():
+                issue_visibility_cache.set((login_rm, task_id), status)
+            result.update(batch_result)
+        return result
 
     def static_path(filename: str) -> str:
         return f'{envs.app_url_external}/static/{filename}'
@@ -108,6 +234,7 @@ def create_app(test_config=None):
         status_id = int(values['status']['value'])
         priority_id = int(values['priority']['value'])
         assigned_to_id = None
+        redmine_assignee = None
 
         mattermost_assignee_login = values['assignee']
 
@@ -120,14 +247,14 @@ def create_app(test_config=None):
 
         done_ratio = int(values['done']['value'])
 
-        with Redmine(envs.redmine_url_external, key=envs.rm_admin_key, impersonate=login_rm).session() as redmine:
+        with redmine_client(login_rm).session() as redmine:
             # exist account and access token in redmine
-            res = check_exist_account_and_token_in_redmine(redmine, login_rm)
-            if type(res) is dict:
-                return res
+            redmine_user = check_exist_account_and_token_in_redmine(redmine, login_rm)
+            if type(redmine_user) is dict:
+                return redmine_user
 
             # check including user in project
-            res = check_included_user_in_project(redmine, project_identifier, login_rm)
+            res = check_included_user_in_project(redmine, project_identifier, login_rm, redmine_user.id)
             if type(res) is dict:
                 return res
 
@@ -140,16 +267,18 @@ def create_app(test_config=None):
 
                 with redmine.session(impersonate=redmine_assignee_login):
                     # check assignee exist account and access token in redmine
-                    res = check_exist_account_and_token_in_redmine(redmine, redmine_assignee_login)
-                    if type(res) is dict:
-                        return res
+                    redmine_assignee = resolve_redmine_user(redmine, redmine_assignee_login)
+                    if type(redmine_assignee) is dict:
+                        return redmine_assignee
 
                     # check including assignee user in project
-                    res = check_included_user_in_project(redmine, project_identifier, redmine_assignee_login)
+                    res = check_included_user_in_project(
+                        redmine, project_identifier, redmine_assignee_login, redmine_assignee.id
+                    )
                     if type(res) is dict:
                         return res
 
-                    assigned_to_id = redmine.user.get('me').id
+                    assigned_to_id = redmine_assignee.id
 
             # valid start date
             start_date_obj = check_format_date(start_date)
@@ -173,23 +302,53 @@ def create_app(test_config=None):
                 return views.long_subject()
 
             # after validation all fields, create new task
-
-            task = redmine.issue.create(
-                project_id=project_identifier,
-                subject=subject,
-                tracker_id=tracker_id,
-                description=description,
-                status_id=status_id,
-                priority_id=priority_id,
-                assigned_to_id=assigned_to_id,
-                start_date=start_date_obj,
-                due_date=end_date_obj,
-                estimated_hours=estimated_time_obj,
-                done_ratio=done_ratio,
-            )
+            try:
+                task = redmine.issue.create(
+                    project_id=project_identifier,
+                    subject=subject,
+                    tracker_id=tracker_id,
+                    description=description,
+                    status_id=status_id,
+                    priority_id=priority_id,
+                    assigned_to_id=assigned_to_id,
+                    start_date=start_date_obj,
+                    due_date=end_date_obj,
+                    estimated_hours=estimated_time_obj,
+                    done_ratio=done_ratio,
+                )
+            except (ForbiddenError, ValidationError) as exp:
+                res = recheck_project_access(
+                    project_identifier, [u for u in (redmine_user, redmine_assignee) if u is not None]
+                )
+                if type(res) is dict:
+                    return res
+                return views.tasks_not_created([f'1. {subject}: {exp}'])
 
             return task
 
+    def validate_assignee(login_mm: str, project_identifier: str):
+        # validation1 [have user in .env file]
+        login_rm = check_exist_login_redmine_in_config_file(login_mm)
+        if type(login_rm) is dict:
+            return login_rm
+
+        with redmine_client(login_rm).session() as redmine:
+            # validation2 [have account and token for REST API]
+            redmine_user = resolve_redmine_user(redmine, login_rm)
+            if type(redmine_user) is dict:
+                return redmine_user
+
+            # validation3 [user isn't included in this project]
+            res = check_included_user_in_project(redmine, project_identifier, redmine_user.login, redmine_user.id)
+            if type(res) is dict:
+                return res
+
+        return redmine_user
+
+    def create_issue(login_rm: str, **fields):
+        with redmine_client(login_rm).session() as redmine:
+            return redmine.issue.create(**fields)
+
     def check_estimated_time(estimated_time):
         if estimated_time is None:
             return estimated_time
@@ -216,17 +375,57 @@ def create_app(test_config=None):
             return views.unregister_mm_account(login_mm)
         return login_rm
 
+    def account_check_result(login_rm, is_valid, data):
+        # a fresh user resource or error view on every call, callers may change them
+        if is_valid:
+            return redmine_client(login_rm).user.to_resource(copy.deepcopy(data))
+        return dict(data)
+
     def check_exist_account_and_token_in_redmine(redmine, login_rm):
+        cached = cached_account(login_rm, envs.rm_admin_key)
+        if cached is not None:
+            return account_check_result(login_rm, *cached)
+
         try:
-            redmine_user = redmine.user.get('current')
+            is_valid, data = True, redmine.user.get('current').raw()
         except ImpersonateError:
-            return views.deactivate_or_not_exist_rm_account(login_rm)
+            is_valid, data = False, views.deactivate_or_not_exist_rm_account(login_rm)
         except AuthError:
-            return views.no_rm_access_token()
-        else:
-            return redmine_user
+            is_valid, data = False, views.no_rm_access_token()
+
+        remember_account(login_rm, envs.rm_admin_key, is_valid, data)
+        return account_check_result(login_rm, is_valid, data)
+
+    async def check_exist_account_and_token_in_redmine_async(redmine_async, login_rm):
+        cached = cached_account(login_rm, envs.rm_admin_key)
+        if cached is not None:
+            return account_check_result(login_rm, *cached)
+
+        try:
+            is_valid, data = True, await redmine_async.current_user()
+        except ImpersonateError:
+            is_valid, data = False, views.deactivate_or_not_exist_rm_account(login_rm)
+        except AuthError:
+            is_valid, data = False, views.no_rm_access_token()
+
+        remember_account(login_rm, envs.rm_admin_key, is_valid, data)
+        return account_check_result(login_rm, is_valid, data)
+
+    def resolve_redmine_user(redmine, login_rm):
+        # assignees are looked up in the user directory, logins it doesn't know yet take the account check
+        user = find_user(login_rm)
+        if user is None:
+            return check_exist_account_and_token_in_redmine(redmine, login_rm)
+        user_id, name, status = user
+        if status != USER_STATUS_ACTIVE:
+            return views.deactivate_or_not_exist_rm_account(login_rm)
+        return redmine.user.to_resource({'id': user_id, 'login': login_rm, 'name': name, 'status': status})
 
-    def check_included_user_in_project(redmine, project_identifier, login_rm):
+    def check_included_user_in_project(redmine, project_identifier, login_rm, user_id=None):
+        # direct members are found in the membership index without a request. Everybody else
+        # (public projects, group members, admins, unknown projects) is checked by redmine itself
+        if user_id is not None and is_project_member(project_identifier, user_id):
+            return
         try:
             project = redmine.project.get(project_identifier)
         except ResourceNotFoundError:
@@ -234,6 +433,18 @@ def create_app(test_config=None):
         except ForbiddenError:
             return views.no_access_project(login_rm, project_identifier)
 
+    def recheck_project_access(project_identifier: str, redmine_users: Sequence):
+        # redmine refused to create an issue, the membership index may miss a change made in redmine.
+        # The members are checked again with a fresh index and redmine itself
+        invalidate_memberships(project_identifier)
+        for redmine_user in redmine_users:
+            res = check_included_user_in_project(
+                redmine_client(redmine_user.login), project_identifier, redmine_user.login, redmine_user.id
+            )
+            if type(res) is dict:
+                return res
+        return True
+
     def check_parsing_text(message: str):
         try:
             parsed_data = parsing_input_text(message)
@@ -297,21 +508,146 @@ def create_app(test_config=None):
 
         return '\n'.join(table)
 
-    def generate_projects_for_form(redmine):
-        result = [{"label": p.name, "value": p.identifier} for p in redmine.project.all()]
+    def requested_page() -> int:
+        # page of a task listing, 1 for the command itself, the value of the pressed button for navigation
+        page = (request.json.get('values') or {}).get('page')
+        if isinstance(page, dict):
+            page = page.get('value')
+        try:
+            return max(int(page), 1)
+        except (TypeError, ValueError):
+            return 1
+
+    def requested_filters() -> dict:
+        # filter name -> value, typed as flags of the command or kept in the state of the page buttons
+        values = request.json.get('values') or {}
+        state = request.json.get('state') or {}
+        filters = {}
+        for field in TASK_FILTER_FIELDS:
+            value = values.get(field['name']) or state.get(field['name'])
+            if isinstance(value, dict):
+                value = value.get('value')
+            if value:
+                filters[field['name']] = str(value).strip()
+        return filters
+
+    def parsing_task_filters(filters: dict) -> dict:
+        # the filters as redmine query parameters, so redmine filters and sorts before anything is sent
+        params = {}
+        if 'status' in filters:
+            if filters['status'] not in TASK_STATUS_FILTERS:
+                raise ValidationFilterError('status', filters['status'])
+            params['status_id'] = TASK_STATUS_FILTERS[filters['status']]
+        if 'project' in filters:
+            params['project_id'] = filters['project']
+        if 'priority' in filters:
+            priority_ids = [p['id'] for p in redmine_metadata.get('priorities')
+                            if filters['priority'].lower() in (p['name'].lower(), str(p['id']))]
+            if not priority_ids:
+                raise ValidationFilterError('priority', filters['priority'])
+            params['priority_id'] = priority_ids[0]
+
+        due_dates = {}
+        for name in ('due_after', 'due_before'):
+            if name in filters:
+                try:
+                    due_dates[name] = datetime.strptime(filters[name], '%d.%m.%Y').date().isoformat()
+                except ValueError:
+                    raise ValidationFilterError(name, filters[name])
+        if len(due_dates) == 2:
+            params['due_date'] = f"><{due_dates['due_after']}|{due_dates['due_before']}"
+        elif 'due_after' in due_dates:
+            params['due_date'] = f">={due_dates['due_after']}"
+        elif 'due_before' in due_dates:
+            params['due_date'] = f"<={due_dates['due_before']}"
+
+        if 'sort' in filters:
+            if filters['sort'] not in TASK_SORT_KEYS:
+                raise ValidationFilterError('sort', filters['sort'])
+            params['sort'] = TASK_SORT_KEYS[filters['sort']]
+        return params
+
+    def fetch_issue_page(redmine, page: int, **params) -> tuple:
+        # (issues of the page, total_count of the query, page). redmine sends total_count with the page,
+        # so one request is enough. Only a page past the end, e.g. after tasks were closed since the
+        # page buttons were shown, is fetched again as the last page
+        issues = redmine.issue.filter(**params, **page_params(page))
+        tasks = list(issues)
+        # total_count is known once the set is evaluated by list()
+        total_count = issues.total_count
+        if not tasks and page > last_page(total_count):
+            return fetch_issue_page(redmine, last_page(total_count), **params)
+        return tasks, total_count, page
+
+    def last_page(total_count: int) -> int:
+        return max(math.ceil(total_count / envs.TASKS_PAGE_SIZE), 1)
+
+    def page_params(page: int) -> dict:
+        # one redmine request for one page
+        return {'limit': envs.TASKS_PAGE_SIZE, 'offset': (page - 1) * envs.TASKS_PAGE_SIZE}
+
+    def paginated_response(path: str, title: str, text: str, page: int, total_count: int, filters: dict) -> dict:
+        pages = last_page(total_count)
+        if pages == 1:
+            return {
+                'type': 'ok',
+                'text': text,
+            }
+
+        # the buttons submit the form again to the same path with the number of the next page,
+        # the filters of the command go along in the state of the call
+        buttons = []
+        if page > 1:
+            buttons.append({'label': 'Previous page', 'value': f'{page - 1}'})
+        if page < pages:
+            buttons.append({'label': 'Next page', 'value': f'{page + 1}'})
+        return {
+            'type': 'form',
+            'form': {
+                'title': f'{title}, page {page} of {pages}',
+                'icon': static_path('redmine.png'),
+                'header': text,
+                'submit': {
+                    'path': path,
+                    'expand': EXPAND_DICT,
+                    'state': filters,
+                },
+                'submit_buttons': 'page',
+                'fields': [
+                    {
+                        'name': 'page',
+                        'type': 'static_select',
+                        'label': 'Page',
+                        'options': buttons,
+                    },
+                ],
+            },
+        }
+
+    def check_form_metadata(state: dict, values: dict):
+        # the form was built from other metadata, e.g. before a change in redmine, the chosen options must still exist
+        if state.get('metadata_version', redmine_metadata.version) == redmine_metadata.version:
+            return True
+        for name, field in (('trackers', 'tracker'), ('statuses', 'status'), ('priorities', 'priority')):
+            if values[field]['value'] not in {f"{item['id']}" for item in redmine_metadata.get(name)}:
+                return views.outdated_form()
+        return True
+
+    def generate_projects_for_form(login_rm):
+        result = visible_projects(login_rm)
         return result
 
-    def generate_trackers_for_form(redmine):
-        result = [{"label": t.name, "value": f'{t.id}'} for t in redmine.tracker.all()]
+    def generate_trackers_for_form():
+        result = [{"label": t['name'], "value": f"{t['id']}"} for t in redmine_metadata.get('trackers')]
         return result
 
-    def generate_priorities_for_form(redmine):
-        result = [{"label": p.name, "value": f'{p.id}'}
-                  for p in redmine.enumeration.filter(resource='issue_priorities')]
+    def generate_priorities_for_form():
+        result = [{"label": p['name'], "value": f"{p['id']}"} for p in redmine_metadata.get('priorities')]
         return result
 
-    def generate_statuses_for_form(redmine):
-        result = [{"label": s.name, "value": f"{s.id}"} for s in redmine.issue_status.all() if s.is_closed is False]
+    def generate_statuses_for_form():
+        result = [{"label": s['name'], "value": f"{s['id']}"}
+                  for s in redmine_metadata.get('statuses') if s.get('is_closed') is not True]
         return result
 
     def subscribe_team_join(context: dict) -> None:
@@ -409,9 +745,12 @@ def create_app(test_config=None):
                             'hint': '[You can look tasks assigned for you]',
                             'label': 'tasks_for_me',
                             'icon': static_path('redmine.png'),
-                            'submit': {
-                                'path': '/tasks_for_me',
-                                'expand': EXPAND_DICT,
+                            'form': {
+                                'submit': {
+                                    'path': '/tasks_for_me',
+                                    'expand': EXPAND_DICT,
+                                },
+                                'fields': TASK_FILTER_FIELDS,
                             },
                         },
                         {  # tasks_by_me
@@ -419,9 +758,12 @@ def create_app(test_config=None):
                             'hint': '[You can look your tasks assigned by you]',
                             'label': 'tasks_by_me',
                             'icon': static_path('redmine.png'),
-                            'submit': {
-                                'path': '/tasks_by_me',
-                                'expand': EXPAND_DICT,
+                            'form': {
+                                'submit': {
+                                    'path': '/tasks_by_me',
+                                    'expand': EXPAND_DICT,
+                                },
+                                'fields': TASK_FILTER_FIELDS,
                             },
                         },
                     ],
@@ -456,6 +798,17 @@ def create_app(test_config=None):
             ]
         }
 
+    @app.route('/metrics')
+    def on_metrics() -> dict:
+        result = metrics.snapshot()
+        result['issue_visibility_cache'] = issue_visibility_cache.stats()
+        result['account_cache'] = account_cache.stats()
+        result['redmine_metadata'] = redmine_metadata.stats()
+        result['project_cache'] = project_cache.stats()
+        result['membership_index'] = membership_index.stats()
+        result['user_directory'] = user_directory.stats()
+        return result
+
     @app.route('/ping', methods=['POST'])
     def on_ping() -> dict:
         logging.debug('ping...')
@@ -490,6 +843,11 @@ def create_app(test_config=None):
         # }
         return {'type': 'ok', 'data': []}
 
+    @app.errorhandler(UpstreamUnavailable)
+    def on_upstream_unavailable(exp):
+        # the breaker of redmine or mattermost is open, answer at once instead of waiting on it
+        return views.upstream_unavailable(exp.name)
+
     @app.before_request
     def load_user():
         if request.method == 'POST' and request.path not in {'/install', '/ping', '/bindings'}:
@@ -505,7 +863,7 @@ def create_app(test_config=None):
         full_name = create_full_name(acting_user['first_name'], acting_user['last_name'])
         author = choose_name(full_name, login_mm)
 
-        with Redmine(envs.redmine_url_external, key=envs.rm_admin_key, impersonate=login_rm).session() as redmine:
+        with redmine_client(login_rm).session() as redmine:
             # validation2 [have account and token for REST API]
             redmine_user = check_exist_account_and_token_in_redmine(redmine, login_rm)
             if type(redmine_user) is dict:
@@ -526,29 +884,40 @@ def create_app(test_config=None):
         full_name = create_full_name(acting_user['first_name'], acting_user['last_name'])
         author = choose_name(full_name, login_mm)
 
-        with Redmine(envs.redmine_url_external, key=envs.rm_admin_key, impersonate=login_rm).session() as redmine:
+        page = requested_page()
+        filters = requested_filters()
+        try:
+            filter_params = parsing_task_filters(filters)
+        except ValidationFilterError as exp:
+            return views.invalid_filter(*exp.args)
+
+        with redmine_client(login_rm).session() as redmine:
             # validation2 [have account and token for REST API]
             res = check_exist_account_and_token_in_redmine(redmine, login_rm)
             if type(res) is dict:
                 return res
 
-            my_tasks = redmine.issue.filter(author_id='me')
-
-            if not my_tasks:
+            try:
+                my_tasks, total_count, page = fetch_issue_page(redmine, page, author_id='me', **filter_params)
+            except (ResourceNotFoundError, ForbiddenError):
+                # redmine answers 404 or 403 for a project which doesn't exist or the user can't see
+                if 'project' not in filters:
+                    raise
+                return views.invalid_filter('project', filters['project'])
+            if not total_count:
                 return views.no_tasks_by_you(author)
 
             url_reported_tasks = f'{envs.redmine_url_external}/issues?c%5B%5D=project&c%5B%5D=tracker&c%5B%5D=status&c%5B%5D=subject&f%5B%5D=status_id&f%5B%5D=author_id&f%5B%5D=project.status&op%5Bauthor_id%5D=%3D&op%5Bproject.status%5D=%3D&op%5Bstatus_id%5D=o&set_filter=1&sort=updated_on%3Adesc&v%5Bauthor_id%5D%5B%5D=me&v%5Bproject.status%5D%5B%5D=1&v%5Bstatus_id%5D%5B%5D='
-            t = sing_plur_tasks(my_tasks)
+            t = sing_plur_tasks(total_count)
             text = '\n'.join((
                 f'# Ok, {author}. I show {t} assigned by you for others.',
                 generating_table_tasks(my_tasks),
                 f'[{t.title()} assigned by me]({url_reported_tasks})'
             ))
 
-            return {
-                'type': 'ok',
-                'text': text,
-            }
+            return paginated_response(
+                '/tasks_by_me', 'Tasks assigned by me', text, page, total_count, filters
+            )
 
     @app.route('/tasks_for_me', methods=['POST'])
     @login_required
@@ -559,28 +928,42 @@ def create_app(test_config=None):
         full_name = create_full_name(acting_user['first_name'], acting_user['last_name'])
         author = choose_name(full_name, login_mm)
 
-        with Redmine(envs.redmine_url_external, key=envs.rm_admin_key, impersonate=login_rm).session() as redmine:
+        page = requested_page()
+        filters = requested_filters()
+        try:
+            filter_params = parsing_task_filters(filters)
+        except ValidationFilterError as exp:
+            return views.invalid_filter(*exp.args)
+
+        with redmine_client(login_rm).session() as redmine:
             # validation2 [have account and token for REST API]
             res = check_exist_account_and_token_in_redmine(redmine, login_rm)
             if type(res) is dict:
                 return res
 
-            tasks_for_me = redmine.issue.filter(assigned_to_id='me')
-            if not tasks_for_me:
+            try:
+                tasks_for_me, total_count, page = fetch_issue_page(
+                    redmine, page, assigned_to_id='me', **filter_params
+                )
+            except (ResourceNotFoundError, ForbiddenError):
+                # redmine answers 404 or 403 for a project which doesn't exist or the user can't see
+                if 'project' not in filters:
+                    raise
+                return views.invalid_filter('project', filters['project'])
+            if not total_count:
                 return views.no_tasks_for_you(author)
 
         url_issues_assigned_to_me = f'{envs.redmine_url_external}/issues?c%5B%5D=project&c%5B%5D=tracker&c%5B%5D=status&c%5B%5D=subject&c%5B%5D=author&f%5B%5D=status_id&f%5B%5D=assigned_to_id&f%5B%5D=project.status&op%5Bassigned_to_id%5D=%3D&op%5Bproject.status%5D=%3D&op%5Bstatus_id%5D=o&set_filter=1&sort=author%2Cpriority%3Adesc%2Cupdated_on%3Adesc&v%5Bassigned_to_id%5D%5B%5D=me&v%5Bproject.status%5D%5B%5D=1&v%5Bstatus_id%5D%5B%5D='
-        t = sing_plur_tasks(tasks_for_me)
+        t = sing_plur_tasks(total_count)
         text = '\n'.join((
             f'# Ok, {author}. I show {t} assigned for you.',
             f'[{t.title()} assigned to me]({url_issues_assigned_to_me})\n',
             generating_table_tasks(tasks_for_me),
         ))
 
-        return {
-            'type': 'ok',
-            'text': text,
-        }
+        return paginated_response(
+            '/tasks_for_me', 'Tasks assigned to me', text, page, total_count, filters
+        )
 
     @app.route('/new_task', methods=['POST'])
     @login_required
@@ -591,22 +974,22 @@ def create_app(test_config=None):
         full_name = create_full_name(acting_user['first_name'], acting_user['last_name'])
         author = choose_name(full_name, login_mm)
 
-        with Redmine(envs.redmine_url_external, key=envs.rm_admin_key, impersonate=login_rm).session() as redmine:
+        with redmine_client(login_rm).session() as redmine:
             # validation2 [have account and token for REST API]
             res = check_exist_account_and_token_in_redmine(redmine, login_rm)
             if type(res) is dict:
                 return res
             print(res)
 
-            options_projects_in_redmine = generate_projects_for_form(redmine)
+            options_projects_in_redmine = generate_projects_for_form(login_rm)
 
             if not options_projects_in_redmine:
                 return views.no_rm_projects(author)
 
             today = date.today().strftime('%d.%m.%Y')
-            options_trackers_in_redmine = generate_trackers_for_form(redmine)
-            options_priorities_in_redmine = generate_priorities_for_form(redmine)
-            options_statuses_in_redmine = generate_statuses_for_form(redmine)
+            options_trackers_in_redmine = generate_trackers_for_form()
+            options_priorities_in_redmine = generate_priorities_for_form()
+            options_statuses_in_redmine = generate_statuses_for_form()
 
         return {
             'type': 'form',
@@ -616,6 +999,8 @@ def create_app(test_config=None):
                 "submit": {
                     "path": "/new_task_submit",
                     "expand": EXPAND_DICT,
+                    # the options of the form are from this version of the redmine metadata
+                    "state": {"metadata_version": redmine_metadata.version},
                 },
                 "fields": [
                     {  # project
@@ -738,13 +1123,13 @@ def create_app(test_config=None):
         full_name = create_full_name(acting_user['first_name'], acting_user['last_name'])
         author = choose_name(full_name, login_mm)
 
-        with Redmine(envs.redmine_url_external, key=envs.rm_admin_key, impersonate=login_rm).session() as redmine:
+        with redmine_client(login_rm).session() as redmine:
             # validation2 [have account and token for REST API]
             res = check_exist_account_and_token_in_redmine(redmine, login_rm)
             if type(res) is dict:
                 return res
 
-            options_projects_in_redmine = generate_projects_for_form(redmine)
+            options_projects_in_redmine = generate_projects_for_form(login_rm)
 
             if not options_projects_in_redmine:
                 return views.no_rm_projects(author)
@@ -800,6 +1185,10 @@ def create_app(test_config=None):
         full_name = create_full_name(acting_user['first_name'], acting_user['last_name'])
         author = choose_name(full_name, login_mm)
 
+        res = check_form_metadata(request.json.get('state') or {}, values)
+        if type(res) is dict:
+            return res
+
         task = validation_create_task_by_form(login_rm, context, values)
         if type(task) is dict:
             return task
@@ -832,48 +1221,68 @@ def create_app(test_config=None):
         if type(parsed_data) is dict:
             return parsed_data
 
-        redmine_users = []
-        with Redmine(envs.redmine_url_external, key=envs.rm_admin_key).session() as redmine:
-            for task, username, dt in parsed_data:
-                # validation1 [have user in .env file]
-                login_in_redmine_next_user = check_exist_login_redmine_in_config_file(username)
-                if type(login_in_redmine_next_user) is dict:
-                    return login_in_redmine_next_user
-
-                with redmine.session(impersonate=login_in_redmine_next_user):
-                    # validation2 [have account and token for REST API]
-                    redmine_user = check_exist_account_and_token_in_redmine(redmine, login_in_redmine_next_user)
-                    if type(redmine_user) is dict:
-                        return redmine_user
-
-                    # validation3 [user isn't included in this project]
-                    res = check_included_user_in_project(redmine, project_identifier, redmine_user.login)
-                    if type(res) is dict:
-                        return res
+        # assignees may come from the user directory, so the creator's check also covers the admin key
+        with redmine_client(login_rm).session() as redmine:
+            creator = check_exist_account_and_token_in_redmine(redmine, login_rm)
+            if type(creator) is dict:
+                return creator
+
+        # every assignee is validated once, however many lines mention the same user
+        usernames = list(dict.fromkeys(username for task, username, dt in parsed_data))
+        assignees = dict(zip(usernames, assignee_check_executor.map(
+            validate_assignee, usernames, [project_identifier] * len(usernames)
+        )))
+        # the first error in the order of the lines is returned
+        for username in usernames:
+            if type(assignees[username]) is dict:
+                return assignees[username]
+
+        # the issues are created in parallel, the table keeps the order of the lines
+        futures = [
+            issue_create_executor.submit(
+                create_issue,
+                login_rm,
+                project_id=project_identifier,
+                subject=task,
+                assigned_to_id=assignees[username].id,
+                start_date=date_today,
+                due_date=dt,
+            )
+            for task, username, dt in parsed_data
+        ]
 
-                    redmine_user.created_task = task
-                    redmine_user.created_date_end = dt
-                    redmine_user.login_mm = username
-                    redmine_users.append(redmine_user)
-
-            with redmine.session(impersonate=login_rm):
-                tasks = []
-                for rm_u in redmine_users:
-                    rm_obj = redmine.issue.create(
-                        project_id=project_identifier,
-                        subject=rm_u.created_task,
-                        assigned_to_id=rm_u.id,
-                        start_date=date_today,
-                        due_date=rm_u.created_date_end,
-                    )
-                    rm_obj.login_mm = rm_u.login_mm
-                    tasks.append(rm_obj)
+        tasks, failed_lines, refused_usernames = [], [], []
+        for line, ((task, username, dt), future) in enumerate(zip(parsed_data, futures), 1):
+            try:
+                rm_obj = future.result()
+            except (BaseRedmineError, requests.RequestException, UpstreamUnavailable) as exp:
+                # the issues created before redmine failed are still reported, a retry would duplicate them
+                logging.error('creating task of line %s failed', line, exc_info=exp)
+                failed_lines.append(f'{line}. {task} @{username}: {exp}')
+                if isinstance(exp, (ForbiddenError, ValidationError)):
+                    refused_usernames.append(username)
+                continue
+            rm_obj.login_mm = username
+            tasks.append(rm_obj)
+
+        if refused_usernames:
+            res = recheck_project_access(
+                project_identifier, [creator, *(assignees[u] for u in dict.fromkeys(refused_usernames))]
+            )
+            if type(res) is dict:
+                if not tasks:
+                    return res
+                failed_lines.append(res['text'].lstrip('# '))
+
+        if not tasks:
+            return views.tasks_not_created(failed_lines)
 
         t = sing_plur_tasks(tasks)
         text = '\n'.join((
             f'# Ok, {author}. I create your {t} in redmine.',
             generating_pretext(login_mm, tasks),
-            generating_table_tasks(tasks)
+            generating_table_tasks(tasks),
+            *(('\n**Not created:**', *failed_lines) if failed_lines else ()),
         ))
 
         return {
@@ -882,10 +1291,23 @@ def create_app(test_config=None):
         }
 
     def websocket_mattermost():
+        consumer_lock = wait_for_consumer_lock(envs.WEBSOCKET_LOCK_FILE)
+        websocket_post_cursor.load()
         asyncio.set_event_loop(event_loop_websocket_mattermost)
-        bot.init_websocket(my_event_handler)
+        bot.init_websocket(on_websocket_event)
 
     if bot:
+        issue_lookup_semaphore = asyncio.Semaphore(envs.ISSUE_LOOKUP_CONCURRENCY)
+        websocket_event_queue = EventQueue(
+            my_event_handler,
+            maxsize=envs.WEBSOCKET_QUEUE_SIZE,
+            workers=envs.WEBSOCKET_WORKERS,
+            policy=envs.WEBSOCKET_QUEUE_POLICY,
+            on_drop=on_websocket_event_dropped,
+        )
+        websocket_post_cursor = PostCursor(envs.WEBSOCKET_CURSOR_FILE, envs.WEBSOCKET_CURSOR_SAVE_INTERVAL)
+        seen_post_ids = TTLCache(envs.SEEN_POSTS_SIZE, envs.SEEN_POSTS_TTL)
+        posts_in_flight = set()
         event_loop_websocket_mattermost = asyncio.new_event_loop()
         Thread(target=websocket_mattermost, daemon=True).start()
 
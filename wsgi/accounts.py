@@ -0,0 +1,27 @@
+from wsgi.caches import TTLCache
+from wsgi.settings import envs
+
+# redmine login -> (admin key, True, raw account data) or (admin key, False, error view) of the account check
+account_cache = TTLCache(envs.ACCOUNT_CACHE_SIZE, envs.ACCOUNT_CACHE_TTL)
+
+
+def cached_account(login_rm: str, admin_key: str):
+    # (is valid, data) of the last check, the answer is only valid for the admin key which made the check
+    cached = account_cache.get(login_rm)
+    if cached is None or cached[0] != admin_key:
+        return None
+    return cached[1], cached[2]
+
+
+def remember_account(login_rm: str, admin_key: str, is_valid: bool, data: dict) -> None:
+    # failed checks expire sooner, so a fixed account is picked up quickly
+    ttl = None if is_valid else envs.ACCOUNT_CACHE_NEGATIVE_TTL
+    account_cache.set(login_rm, (admin_key, is_valid, data), ttl=ttl)
+
+
+def invalidate_account(login_rm: str = None) -> None:
+    # forget one login, or every login when accounts were changed by the admin
+    if login_rm is None:
+        account_cache.clear()
+    else:
+        account_cache.pop(login_rm)
@@ -8,3 +8,7 @@ class ValidationDateError(BaseClientError):
 
 class ValidationTextError(BaseClientError):
     pass
+
+
+class ValidationFilterError(BaseClientError):
+    pass
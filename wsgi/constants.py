@@ -15,3 +15,60 @@ EXPAND_DICT = {
 }
 
 OPTIONS_DONE_FOR_FORM = [{'label': f'{d} %', 'value': f'{d}'} for d in range(0, 110, 10)]
+
+# filter value -> redmine status_id
+TASK_STATUS_FILTERS = {'open': 'open', 'closed': 'closed', 'all': '*'}
+# sort key -> redmine sort
+TASK_SORT_KEYS = {
+    'updated': 'updated_on:desc',
+    'created': 'created_on:desc',
+    'due_date': 'due_date',
+    'priority': 'priority:desc',
+    'id': 'id',
+}
+
+# flags of /redmine tasks_for_me and /redmine tasks_by_me
+TASK_FILTER_FIELDS = [
+    {
+        'name': 'status',
+        'type': 'static_select',
+        'label': 'status',
+        'description': 'Open, closed or all tasks',
+        'options': [{'label': s, 'value': s} for s in TASK_STATUS_FILTERS],
+    },
+    {
+        'name': 'project',
+        'type': 'text',
+        'label': 'project',
+        'description': 'Identifier of redmine project',
+        'hint': 'project identifier',
+    },
+    {
+        'name': 'priority',
+        'type': 'text',
+        'label': 'priority',
+        'description': 'Name of redmine priority',
+        'hint': 'name priority',
+    },
+    {
+        'name': 'due_after',
+        'type': 'text',
+        'label': 'due_after',
+        'description': 'Tasks with end date on or after this day',
+        'hint': 'day.month.year(03.03.2023)',
+    },
+    {
+        'name': 'due_before',
+        'type': 'text',
+        'label': 'due_before',
+        'description': 'Tasks with end date on or before this day',
+        'hint': 'day.month.year(03.03.2023)',
+    },
+    {
+        'name': 'sort',
+        'type': 'static_select',
+        'label': 'sort',
+        'description': 'Order of tasks',
+        'options': [{'label': k, 'value': k} for k in TASK_SORT_KEYS],
+    },
+]
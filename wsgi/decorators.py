@@ -4,6 +4,7 @@ from httpx import HTTPError
 from redminelib.exceptions import BaseRedmineError
 
 from wsgi import views
+from wsgi.upstreams import UpstreamUnavailable
 
 
 def login_required(view):
@@ -17,20 +18,22 @@ def login_required(view):
 
 
 def decorator_http_error(func):
+    @functools.wraps(func)
     def wrapper(*args, **kwargs):
         try:
             return func(*args, **kwargs)
-        except HTTPError as exp:
+        except (HTTPError, UpstreamUnavailable) as exp:
             logging.error("<###traceback###\n%s\n###traceback###>\n\n", traceback.format_exc())
             return exp
     return wrapper
 
 
 def decorator_redmine_error(func):
+    @functools.wraps(func)
     def wrapper(*args, **kwargs):
         try:
             return func(*args, **kwargs)
-        except BaseRedmineError as exp:
+        except (BaseRedmineError, UpstreamUnavailable) as exp:
             logging.error("<###traceback###\n%s\n###traceback###>\n\n", traceback.format_exc())
             return exp
     return wrapper
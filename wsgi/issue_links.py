@@ -0,0 +1,64 @@
+import re
+from typing import Iterable
+
+from redminelib.exceptions import ForbiddenError
+
+from wsgi.caches import TTLCache
+from wsgi.settings import envs
+
+ISSUE_VISIBLE = 'visible'
+ISSUE_NOT_FOUND = 'not_found'
+ISSUE_FORBIDDEN = 'forbidden'
+
+# redmine keeps issue ids in a 32-bit integer column
+MAX_ISSUE_ID = 2 ** 31 - 1
+# redmine silently caps limit at 100
+REDMINE_MAX_LIMIT = 100
+
+# #t(id task), but not inside markdown link text like [#t10](...)
+ISSUE_LINK_RE = re.compile(r'(?<!\[)#t(\d+)')
+
+# (redmine login, issue id) -> ISSUE_VISIBLE | ISSUE_NOT_FOUND | ISSUE_FORBIDDEN
+issue_visibility_cache = TTLCache(envs.ISSUE_CACHE_SIZE, envs.ISSUE_CACHE_TTL)
+
+
+async def resolve_issues(redmine_async, task_ids: Iterable[int]) -> dict:
+    # /issues.json?issue_id=1,2,3 requests of up to 100 ids for the user of the AsyncRedmine client.
+    # Redmine drops issues the user can't see from the result, so a missing id is classed as not found
+    task_ids = list(dict.fromkeys(task_ids))
+    result = dict.fromkeys(task_ids, ISSUE_NOT_FOUND)
+    query_ids = [i for i in task_ids if 0 < i <= MAX_ISSUE_ID]
+    if not query_ids:
+        return result
+
+    visible_ids = set()
+    for i in range(0, len(query_ids), REDMINE_MAX_LIMIT):
+        chunk = query_ids[i:i + REDMINE_MAX_LIMIT]
+        try:
+            data = await redmine_async.filter_issues(
+                issue_id=','.join(str(task_id) for task_id in chunk),
+                status_id='*',
+                limit=len(chunk),
+            )
+        except ForbiddenError:
+            return dict.fromkeys(task_ids, ISSUE_FORBIDDEN)
+        visible_ids.update(issue['id'] for issue in data['issues'])
+
+    for task_id in visible_ids:
+        result[task_id] = ISSUE_VISIBLE
+    return result
+
+
+def find_issue_ids(message: str) -> list:
+    return [int(task_id) for task_id in ISSUE_LINK_RE.findall(message)]
+
+
+def rewrite_issue_links(message: str, statuses: dict, redmine_url: str) -> str:
+    # one pass over the message, only links to visible issues are replaced
+    def replace(match: re.Match) -> str:
+        task_id = int(match.group(1))
+        if statuses.get(task_id) == ISSUE_VISIBLE:
+            return f'{redmine_url}/issues/{task_id}'
+        return match.group(0)
+
+    return ISSUE_LINK_RE.sub(replace, message)
@@ -0,0 +1,39 @@
+from redminelib.exceptions import ResourceNotFoundError, ForbiddenError
+
+from wsgi.caches import TTLCache
+from wsgi.redmine_session import redmine_client
+from wsgi.settings import envs
+
+# project identifier -> frozenset of ids of users who are direct members of the project.
+# Each project is reloaded on its own when its entry expires
+membership_index = TTLCache(envs.MEMBERSHIP_INDEX_SIZE, envs.MEMBERSHIP_INDEX_TTL)
+
+
+def load_project_members(project_identifier: str) -> frozenset:
+    redmine = redmine_client()
+    # without limit python-redmine reads every membership, 100 per request
+    memberships = redmine.project_membership.filter(project_id=project_identifier)
+    # group memberships have no user, their members take the slow path
+    return frozenset(m.user.id for m in memberships if hasattr(m, 'user'))
+
+
+def project_members(project_identifier: str) -> frozenset:
+    members = membership_index.get(project_identifier)
+    if members is None:
+        try:
+            members = load_project_members(project_identifier)
+        except (ResourceNotFoundError, ForbiddenError):
+            return frozenset()
+        membership_index.set(project_identifier, members)
+    return members
+
+
+def is_project_member(project_identifier: str, user_id: int) -> bool:
+    return user_id in project_members(project_identifier)
+
+
+def invalidate_memberships(project_identifier: str = None) -> None:
+    if project_identifier is None:
+        membership_index.clear()
+    else:
+        membership_index.pop(project_identifier)
@@ -0,0 +1,91 @@
+import hashlib, json, logging, threading, time
+
+from wsgi.redmine_session import redmine_client
+from wsgi.settings import envs
+
+
+def _load_trackers() -> list:
+    return [t.raw() for t in redmine_client().tracker.all()]
+
+
+def _load_priorities() -> list:
+    return [p.raw() for p in redmine_client().enumeration.filter(resource='issue_priorities')]
+
+
+def _load_statuses() -> list:
+    return [s.raw() for s in redmine_client().issue_status.all()]
+
+
+def _load_roles() -> list:
+    return [r.raw() for r in redmine_client().role.all()]
+
+
+REDMINE_LOADERS = {
+    'trackers': _load_trackers,
+    'priorities': _load_priorities,
+    'statuses': _load_statuses,
+    'roles': _load_roles,
+}
+
+
+class RedmineMetadata:
+    # trackers, issue priorities, issue statuses and roles are the same for every user and change rarely.
+    # They are loaded with the admin key and served from memory, a daemon thread reloads them every
+    # interval seconds. version is a hash of the loaded data, so every gunicorn worker computes the same
+    # value for the same data. Forms carry it to tell whether their options may be outdated.
+    # interval=0 disables the cache and every get loads only the requested list from redmine
+    def __init__(self, interval: float, loaders: dict = REDMINE_LOADERS):
+        self.interval = interval
+        self.version = None
+        self.loaded_at = None
+        self._loaders = loaders
+        self._data = None
+        self._lock = threading.Lock()
+        self._thread = None
+
+    def refresh(self) -> dict:
+        data = {name: load() for name, load in self._loaders.items()}
+        with self._lock:
+            if data != self._data:
+                self._data = data
+                self.version = hashlib.sha1(json.dumps(data, sort_keys=True, default=str).encode()).hexdigest()
+            self.loaded_at = time.time()
+        return data
+
+    def invalidate(self) -> None:
+        # the next get loads the data again
+        with self._lock:
+            self._data = None
+
+    def get(self, name: str) -> list:
+        if self.interval <= 0:
+            return self._loaders[name]()
+        data = self._data
+        if data is None:
+            data = self.refresh()
+        self._start_refresh_thread()
+        return data[name]
+
+    def _start_refresh_thread(self) -> None:
+        # started on first use, so every gunicorn worker has its own thread after the fork
+        if self._thread is not None and self._thread.is_alive():
+            return
+        with self._lock:
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(target=self._refresh_forever, name='redmine_metadata', daemon=True)
+                self._thread.start()
+
+    def _refresh_forever(self) -> None:
+        while True:
+            time.sleep(self.interval)
+            try:
+                self.refresh()
+            except Exception:
+                # the old data is served until redmine answers again
+                logging.exception('refresh of redmine metadata failed')
+
+    def stats(self) -> dict:
+        return {'version': self.version, 'loaded_at': self.loaded_at, 'interval': self.interval}
+
+
+redmine_metadata = RedmineMetadata(envs.METADATA_REFRESH_INTERVAL)
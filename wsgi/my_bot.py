@@ -1,10 +1,17 @@
+import asyncio, functools, logging
+from concurrent.futures import ThreadPoolExecutor
 from mattermostautodriver import Driver
 
 from wsgi.settings import envs
 from wsgi.decorators import decorator_http_error
+from wsgi.upstreams import mattermost_upstream
+
+# outbound calls from the websocket loop run here, the pool size caps how many are in flight
+outbound_executor = ThreadPoolExecutor(max_workers=envs.MM_OUTBOUND_CONCURRENCY, thread_name_prefix='mm_outbound')
 
 
 @decorator_http_error
+@mattermost_upstream.guard()
 def send_ephemeral_post(user_id, channel_id, msg):
     resp = bot.posts.create_post_ephemeral(options={
         'user_id': user_id,
@@ -17,16 +24,67 @@ def send_ephemeral_post(user_id, channel_id, msg):
 
 
 @decorator_http_error
+@mattermost_upstream.guard()
+def patch_post(post_id, msg):
+    return bot.posts.patch_post(post_id=post_id, options={'id': post_id, 'message': msg})
+
+
+async def run_outbound(func, *args):
+    # the call ends by its own timeouts and retry budget, the wait only ends a call which is stuck anyway
+    timeout = mattermost_upstream.max_call_time + mattermost_upstream.connect_timeout
+    loop = asyncio.get_running_loop()
+    try:
+        return await asyncio.wait_for(
+            loop.run_in_executor(outbound_executor, functools.partial(func, *args)), timeout
+        )
+    except asyncio.TimeoutError as exp:
+        logging.error('%s timed out after %s seconds', func.__name__, timeout)
+        return exp
+
+
+async def send_ephemeral_post_async(user_id, channel_id, msg):
+    return await run_outbound(send_ephemeral_post, user_id, channel_id, msg)
+
+
+async def patch_post_async(post_id, msg):
+    return await run_outbound(patch_post, post_id, msg)
+
+
+@decorator_http_error
+@mattermost_upstream.guard(idempotent=True)
+def get_posts_since(since: int) -> list:
+    # (post, sender login) created after since (unix ms) in the channels of the bot, oldest first
+    posts = []
+    for channel in bot.channels.get_channels_for_user('me'):
+        if channel['last_post_at'] <= since:
+            continue
+        resp = bot.posts.get_posts_for_channel(channel['id'], params={'since': since})
+        posts.extend(
+            post for post in resp['posts'].values()
+            if post['create_at'] > since and not post['delete_at'] and not post['type']
+            and post['user_id'] != bot.client.userid
+        )
+    posts.sort(key=lambda post: post['create_at'])
+
+    user_ids = list({post['user_id'] for post in posts})
+    logins = {u['id']: u['username'] for u in bot.users.get_users_by_ids(user_ids)} if user_ids else {}
+    return [(post, logins[post['user_id']]) for post in posts if post['user_id'] in logins]
+
+
+@decorator_http_error
+@mattermost_upstream.guard()
 def create_user(options: dict):
     return bot.users.create_user(options)
 
 
 @decorator_http_error
+@mattermost_upstream.guard()
 def create_token(user_id, options):
     return bot.users.create_user_access_token(user_id, options)
 
 
 @decorator_http_error
+@mattermost_upstream.guard(idempotent=True)
 def get_user_by_username(username: str):
     return bot.users.get_user_by_username(username)
 
@@ -46,6 +104,7 @@ if envs.mm_app_token:
         'port': int(envs.MM_PORT_EXTERNAL),
         'token': envs.mm_app_token,
         'verify': True,  # Or /path/to/file.pem
+        'request_timeout': mattermost_upstream.httpx_timeout,
     })
 
     bot.login()
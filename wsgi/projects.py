@@ -0,0 +1,71 @@
+import logging, threading, time
+
+from wsgi.caches import TTLCache
+from wsgi.redmine_session import redmine_client
+from wsgi.settings import envs
+
+# redmine login -> [{'label': name, 'value': identifier}] of the projects the user can see
+project_cache = TTLCache(envs.PROJECT_CACHE_SIZE, envs.PROJECT_CACHE_TTL)
+# redmine logins which opened a form recently, their project lists are kept warm
+recent_logins = TTLCache(envs.PROJECT_CACHE_SIZE, envs.PROJECT_WARMUP_ACTIVE_TTL)
+
+_lock = threading.Lock()
+_warmup_thread = None
+
+
+def load_projects(login_rm: str) -> list:
+    with redmine_client(login_rm).session() as redmine:
+        # without limit python-redmine reads every project, 100 per request
+        return [{'label': p.name, 'value': p.identifier} for p in redmine.project.all()]
+
+
+def is_current(login_rm: str, projects: list) -> bool:
+    # one request for one project tells whether the user joined or left a project in redmine since the list
+    # was cached: the total count or the first project differ then
+    with redmine_client(login_rm).session() as redmine:
+        first = redmine.project.all(limit=1)
+        identifiers = [p.identifier for p in first]
+        # total_count is known once the set is evaluated
+        if first.total_count != len(projects):
+            return False
+    return not projects or identifiers == [projects[0]['value']]
+
+
+def visible_projects(login_rm: str) -> list:
+    recent_logins.set(login_rm, True)
+    _start_warmup_thread()
+
+    projects = project_cache.get(login_rm)
+    if projects is None or not is_current(login_rm, projects):
+        projects = load_projects(login_rm)
+        project_cache.set(login_rm, projects)
+    return list(projects)
+
+
+def invalidate_projects(login_rm: str = None) -> None:
+    # forget one login, or every login when projects or memberships were changed by the admin
+    if login_rm is None:
+        project_cache.clear()
+    else:
+        project_cache.pop(login_rm)
+
+
+def _start_warmup_thread() -> None:
+    # PROJECT_WARMUP_INTERVAL=0 turns the warm-up off, lists are then loaded on the first form after expiry
+    global _warmup_thread
+    if envs.PROJECT_WARMUP_INTERVAL <= 0 or (_warmup_thread is not None and _warmup_thread.is_alive()):
+        return
+    with _lock:
+        if _warmup_thread is None or not _warmup_thread.is_alive():
+            _warmup_thread = threading.Thread(target=_warmup_forever, name='project_warmup', daemon=True)
+            _warmup_thread.start()
+
+
+def _warmup_forever() -> None:
+    while True:
+        time.sleep(envs.PROJECT_WARMUP_INTERVAL)
+        for login_rm in recent_logins.keys():
+            try:
+                project_cache.set(login_rm, load_projects(login_rm))
+            except Exception:
+                logging.exception('warm-up of projects for %s failed', login_rm)
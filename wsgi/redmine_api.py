@@ -1,71 +1,137 @@
+import threading
+from concurrent.futures import ThreadPoolExecutor
 from redminelib import Redmine
 
 from wsgi.settings import envs
 from wsgi.decorators import decorator_redmine_error
+from wsgi.redmine_session import PooledEngine
+from wsgi.accounts import invalidate_account
+from wsgi.metadata import redmine_metadata
+from wsgi.projects import invalidate_projects
+from wsgi.memberships import invalidate_memberships
+from wsgi.users import user_directory
+
+_lock = threading.Lock()
+_admin_client = None
+
+
+def admin_client() -> Redmine:
+    # one admin client on the pooled connections for every function below,
+    # made again when the admin key changes
+    global _admin_client
+    with _lock:
+        if _admin_client is None or _admin_client.engine.requests['params'].get('key') != envs.rm_admin_key:
+            _admin_client = Redmine(envs.redmine_url_external, key=envs.rm_admin_key, engine=PooledEngine)
+        return _admin_client
+
+
+def run_bulk(func, items: list) -> list:
+    # func(**fields) for every item at once, results (or errors) keep the order of the items
+    with ThreadPoolExecutor(max_workers=envs.REDMINE_POOL_SIZE, thread_name_prefix='redmine_bulk') as executor:
+        return list(executor.map(lambda fields: func(**fields), items))
 
 
 @decorator_redmine_error
 def create_redmine_user(**fields):
-    redmine = Redmine(envs.redmine_url_external, key=envs.rm_admin_key)
-    return redmine.user.create(**fields)
+    redmine = admin_client()
+    user = redmine.user.create(**fields)
+    invalidate_account(fields.get('login'))
+    user_directory.invalidate()
+    return user
+
+
+def create_redmine_users(users: list) -> list:
+    return run_bulk(create_redmine_user, users)
 
 
 @decorator_redmine_error
 def delete_redmine_user(resource_id: int):
-    redmine = Redmine(envs.redmine_url_external, key=envs.rm_admin_key)
-    return redmine.user.delete(resource_id)
+    redmine = admin_client()
+    result = redmine.user.delete(resource_id)
+    invalidate_account()
+    invalidate_projects()
+    user_directory.invalidate()
+    invalidate_memberships()
+    return result
 
 
 @decorator_redmine_error
 def delete_redmine_user_by_username(username: str):
-    redmine = Redmine(envs.redmine_url_external, key=envs.rm_admin_key)
+    redmine = admin_client()
     for u in redmine.user.filter(name=username):
-        return u.delete()
+        result = u.delete()
+        invalidate_account(username)
+        user_directory.invalidate()
+        invalidate_projects(username)
+        invalidate_memberships()
+        return result
 
 
 @decorator_redmine_error
 def create_redmine_project(**fields):
-    redmine = Redmine(envs.redmine_url_external, key=envs.rm_admin_key)
-    return redmine.project.create(**fields)
+    redmine = admin_client()
+    project = redmine.project.create(**fields)
+    invalidate_projects()
+    invalidate_memberships()
+    return project
 
 
 @decorator_redmine_error
 def delete_redmine_project(resource_id):
-    redmine = Redmine(envs.redmine_url_external, key=envs.rm_admin_key)
-    return redmine.project.delete(resource_id)
+    redmine = admin_client()
+    result = redmine.project.delete(resource_id)
+    invalidate_projects()
+    invalidate_memberships()
+    return result
 
 
 @decorator_redmine_error
 def create_project_memberships(**fields):
-    redmine = Redmine(envs.redmine_url_external, key=envs.rm_admin_key)
-    return redmine.project_membership.create(**fields)
+    redmine = admin_client()
+    membership = redmine.project_membership.create(**fields)
+    invalidate_projects()
+    invalidate_memberships()
+    return membership
+
+
+def create_project_memberships_bulk(memberships: list) -> list:
+    return run_bulk(create_project_memberships, memberships)
+
+
+@decorator_redmine_error
+def delete_project_membership(resource_id):
+    redmine = admin_client()
+    result = redmine.project_membership.delete(resource_id)
+    invalidate_projects()
+    invalidate_memberships()
+    return result
 
 
 @decorator_redmine_error
 def delete_issue(resource_id):
-    redmine = Redmine(envs.redmine_url_external, key=envs.rm_admin_key)
+    redmine = admin_client()
     return redmine.issue.delete(resource_id)
 
 
 @decorator_redmine_error
 def all_roles():
-    redmine = Redmine(envs.redmine_url_external, key=envs.rm_admin_key)
-    return redmine.role.all()
+    redmine = admin_client()
+    return redmine.role.to_resource_set(redmine_metadata.get('roles'))
 
 
 @decorator_redmine_error
 def all_trackers():
-    redmine = Redmine(envs.redmine_url_external, key=envs.rm_admin_key)
-    return redmine.tracker.all()
+    redmine = admin_client()
+    return redmine.tracker.to_resource_set(redmine_metadata.get('trackers'))
 
 
 @decorator_redmine_error
 def all_issue_statuses():
-    redmine = Redmine(envs.redmine_url_external, key=envs.rm_admin_key)
-    return redmine.issue_status.all()
+    redmine = admin_client()
+    return redmine.issue_status.to_resource_set(redmine_metadata.get('statuses'))
 
 
 @decorator_redmine_error
 def all_priorities():
-    redmine = Redmine(envs.redmine_url_external, key=envs.rm_admin_key)
-    return redmine.enumeration.filter(resource='issue_priorities')
+    redmine = admin_client()
+    return redmine.enumeration.to_resource_set(redmine_metadata.get('priorities'))
@@ -0,0 +1,103 @@
+import asyncio, weakref
+import httpx
+from redminelib import exceptions
+
+from wsgi import settings
+from wsgi.upstreams import redmine_upstream
+
+# one connection pool per event loop, an httpx client can't be shared between loops
+_clients = weakref.WeakKeyDictionary()
+
+# python-redmine raises these for the same status codes, so both clients are handled the same way
+_ERRORS = {
+    401: exceptions.AuthError,
+    403: exceptions.ForbiddenError,
+    404: exceptions.ResourceNotFoundError,
+    409: exceptions.ConflictError,
+    412: exceptions.ImpersonateError,
+    413: exceptions.RequestEntityTooLargeError,
+    500: exceptions.ServerError,
+}
+
+
+def async_http_client() -> httpx.AsyncClient:
+    loop = asyncio.get_running_loop()
+    client = _clients.get(loop)
+    if client is None:
+        client = httpx.AsyncClient(
+            limits=httpx.Limits(max_connections=settings.envs.REDMINE_POOL_SIZE),
+            timeout=redmine_upstream.httpx_timeout,
+        )
+        _clients[loop] = client
+    return client
+
+
+class AsyncRedmine:
+    # asyncio client for the redmine calls of the handlers. Methods return the json of redmine
+    def __init__(self, impersonate: str = None):
+        envs = settings.envs
+        self.url = envs.redmine_url_external.rstrip('/')
+        self.headers = {'X-Redmine-API-Key': envs.rm_admin_key or ''}
+        if impersonate is not None:
+            self.headers['X-Redmine-Switch-User'] = impersonate
+
+    async def request(self, method: str, path: str, params: dict = None, json: dict = None):
+        response = await redmine_upstream.call_async(
+            async_http_client().request,
+            method,
+            f'{self.url}{path}',
+            params=params,
+            json=json,
+            headers=self.headers,
+            idempotent=method == 'GET',
+        )
+        if response.status_code in (200, 201, 204):
+            return response.json() if response.content.strip() else True
+        if response.status_code == 422:
+            errors = response.json()['errors']
+            raise exceptions.ValidationError(', '.join(': '.join(e) if isinstance(e, list) else e for e in errors))
+        if response.status_code in _ERRORS:
+            raise _ERRORS[response.status_code]
+        raise exceptions.UnknownError(response.status_code)
+
+    async def get_all(self, path: str, container: str, params: dict = None) -> list:
+        # every page of a collection, 100 is the max page size of redmine
+        params = dict(params or {}, limit=100, offset=0)
+        result = []
+        while True:
+            data = await self.request('GET', path, params=params)
+            result.extend(data[container])
+            params['offset'] += params['limit']
+            if params['offset'] >= data.get('total_count', 0):
+                return result
+
+    async def current_user(self) -> dict:
+        return (await self.request('GET', '/users/current.json'))['user']
+
+    async def get_issue(self, issue_id: int, **params) -> dict:
+        return (await self.request('GET', f'/issues/{issue_id}.json', params=params))['issue']
+
+    async def filter_issues(self, **params) -> dict:
+        # one page of issues, {'issues': [...], 'total_count': n, 'offset': n, 'limit': n}
+        return await self.request('GET', '/issues.json', params=params)
+
+    async def create_issue(self, **fields) -> dict:
+        return (await self.request('POST', '/issues.json', json={'issue': fields}))['issue']
+
+    async def get_project(self, identifier: str) -> dict:
+        return (await self.request('GET', f'/projects/{identifier}.json'))['project']
+
+    async def projects(self) -> list:
+        return await self.get_all('/projects.json', 'projects')
+
+    async def trackers(self) -> list:
+        return (await self.request('GET', '/trackers.json'))['trackers']
+
+    async def issue_statuses(self) -> list:
+        return (await self.request('GET', '/issue_statuses.json'))['issue_statuses']
+
+    async def priorities(self) -> list:
+        return (await self.request('GET', '/enumerations/issue_priorities.json'))['issue_priorities']
+
+    async def roles(self) -> list:
+        return (await self.request('GET', '/roles.json'))['roles']
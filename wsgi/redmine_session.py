@@ -0,0 +1,65 @@
+import threading
+import requests
+from requests.adapters import HTTPAdapter
+from redminelib import Redmine
+from redminelib.engines.sync import SyncEngine
+
+from wsgi import settings
+from wsgi.singleflight import SingleFlight
+from wsgi.upstreams import redmine_upstream
+
+_lock = threading.Lock()
+_session = None
+# identical admin GETs in flight at the same moment go out once. gunicorn runs sync workers, so only
+# threads of one process overlap: the executor threads of a bulk submit loading the same membership
+# index or user directory, and the refresh threads of the metadata and project caches
+_reads = SingleFlight('redmine_reads')
+
+
+def pooled_session() -> requests.Session:
+    # one keep-alive connection pool to redmine for the whole process
+    global _session
+    if _session is None:
+        with _lock:
+            if _session is None:
+                session = requests.Session()
+                adapter = HTTPAdapter(pool_connections=1, pool_maxsize=settings.envs.REDMINE_POOL_SIZE)
+                session.mount('http://', adapter)
+                session.mount('https://', adapter)
+                _session = session
+    return _session
+
+
+class PooledSession:
+    # view of the pooled session for one engine. The api key, the X-Redmine-Switch-User header
+    # and other engine options go with every call, so the shared session itself never changes
+    def __init__(self, **params):
+        self.params = params
+
+    def request(self, method, url, **kwargs):
+        for name, value in self.params.items():
+            if isinstance(value, dict) and isinstance(kwargs.get(name, {}), dict):
+                kwargs[name] = dict(value, **kwargs.get(name, {}))
+            else:
+                kwargs.setdefault(name, value)
+        kwargs.setdefault('timeout', redmine_upstream.timeout)
+        # reads of an impersonated user belong to one request of that user and never overlap
+        impersonated = 'X-Redmine-Switch-User' in (kwargs.get('headers') or {})
+        if method.lower() == 'get' and not kwargs.get('stream') and not impersonated:
+            key = (url, tuple(sorted((name, str(value)) for name, value in (kwargs.get('params') or {}).items())))
+            return _reads.do(
+                key, redmine_upstream.call, pooled_session().request, method, url, idempotent=True, **kwargs
+            )
+        return redmine_upstream.call(pooled_session().request, method, url, **kwargs)
+
+
+class PooledEngine(SyncEngine):
+    @staticmethod
+    def create_session(**params):
+        return PooledSession(**params)
+
+
+def redmine_client(impersonate: str = None) -> Redmine:
+    # settings.envs is read on every call, the url and the admin key can be replaced after import
+    envs = settings.envs
+    return Redmine(envs.redmine_url_external, key=envs.rm_admin_key, impersonate=impersonate, engine=PooledEngine)
@@ -1,6 +1,6 @@
 from dotenv import load_dotenv
 
-import dotenv, os
+import dotenv, os, tempfile
 from abc import ABC, abstractmethod
 
 
@@ -37,6 +37,90 @@ class Conf(ABC):
         self.redmine_url_external = os.environ['redmine_url_external']
         self.mattermost_url_external = os.environ['mattermost_url_external']
 
+        # connect and read timeouts in seconds and retries of idempotent GETs to redmine
+        self.REDMINE_CONNECT_TIMEOUT = float(os.environ.get('REDMINE_CONNECT_TIMEOUT', 3))
+        self.REDMINE_READ_TIMEOUT = float(os.environ.get('REDMINE_READ_TIMEOUT', 15))
+        self.REDMINE_RETRIES = int(os.environ.get('REDMINE_RETRIES', 2))
+        # base delay in seconds of the jittered exponential backoff between retries
+        self.RETRY_BACKOFF = float(os.environ.get('RETRY_BACKOFF', 0.2))
+        # seconds one call to redmine or mattermost may take with its retries, kept below the timeout of
+        # mattermost apps calls so a failing upstream is answered before mattermost gives up on the call
+        self.RETRY_BUDGET = float(os.environ.get('RETRY_BUDGET', 20))
+        # after BREAKER_FAILURE_THRESHOLD failed calls in a row calls to redmine or mattermost fail at once
+        # for BREAKER_RESET_TIMEOUT seconds
+        self.BREAKER_FAILURE_THRESHOLD = int(os.environ.get('BREAKER_FAILURE_THRESHOLD', 5))
+        self.BREAKER_RESET_TIMEOUT = float(os.environ.get('BREAKER_RESET_TIMEOUT', 30))
+
+        # max number of keep-alive connections to redmine kept by the process
+        self.REDMINE_POOL_SIZE = int(os.environ.get('REDMINE_POOL_SIZE', 10))
+
+        # seconds between reloads of trackers, priorities, statuses and roles, 0 disables the cache
+        self.METADATA_REFRESH_INTERVAL = float(os.environ.get('METADATA_REFRESH_INTERVAL', 600))
+
+        # cache of redmine account and token checks per login, failed checks expire sooner
+        self.ACCOUNT_CACHE_SIZE = int(os.environ.get('ACCOUNT_CACHE_SIZE', 1000))
+        self.ACCOUNT_CACHE_TTL = float(os.environ.get('ACCOUNT_CACHE_TTL', 300))
+        self.ACCOUNT_CACHE_NEGATIVE_TTL = float(os.environ.get('ACCOUNT_CACHE_NEGATIVE_TTL', 10))
+
+        # rows of tasks_for_me and tasks_by_me on one page, redmine allows at most 100
+        self.TASKS_PAGE_SIZE = int(os.environ.get('TASKS_PAGE_SIZE', 25))
+
+        # cache of projects visible to each redmine login, used by the /new_task and /new_tasks forms.
+        # A cached list is checked against redmine with a one project request before it is used.
+        # Every PROJECT_WARMUP_INTERVAL seconds the lists of logins which opened a form within
+        # PROJECT_WARMUP_ACTIVE_TTL seconds are reloaded, 0 turns the warm-up off
+        self.PROJECT_CACHE_SIZE = int(os.environ.get('PROJECT_CACHE_SIZE', 1000))
+        self.PROJECT_CACHE_TTL = float(os.environ.get('PROJECT_CACHE_TTL', 60))
+        self.PROJECT_WARMUP_INTERVAL = float(os.environ.get('PROJECT_WARMUP_INTERVAL', 0))
+        self.PROJECT_WARMUP_ACTIVE_TTL = float(os.environ.get('PROJECT_WARMUP_ACTIVE_TTL', 3600))
+
+        # seconds between reloads of the directory of redmine users used to resolve assignees, 0 turns it off
+        self.USER_DIRECTORY_REFRESH_INTERVAL = float(os.environ.get('USER_DIRECTORY_REFRESH_INTERVAL', 600))
+
+        # project -> member users index for the project access checks of task creation. A user missing in it
+        # is checked by redmine, a refused issue creation drops the project from it
+        self.MEMBERSHIP_INDEX_SIZE = int(os.environ.get('MEMBERSHIP_INDEX_SIZE', 1000))
+        self.MEMBERSHIP_INDEX_TTL = float(os.environ.get('MEMBERSHIP_INDEX_TTL', 60))
+
+        # max number of assignees validated and issues created at once by one /new_tasks submit
+        self.ASSIGNEE_CHECK_CONCURRENCY = int(os.environ.get('ASSIGNEE_CHECK_CONCURRENCY', 4))
+        self.ISSUE_CREATE_CONCURRENCY = int(os.environ.get('ISSUE_CREATE_CONCURRENCY', 4))
+
+        # max number of redmine issue lookups in flight for the posts with #t(id task) links
+        self.ISSUE_LOOKUP_CONCURRENCY = int(os.environ.get('ISSUE_LOOKUP_CONCURRENCY', 8))
+        # max number of issue ids in one /issues.json?issue_id=... request
+        self.ISSUE_LOOKUP_BATCH_SIZE = int(os.environ.get('ISSUE_LOOKUP_BATCH_SIZE', 100))
+        # cache of issue visibility per (redmine login, issue id), 0 disables the cache
+        self.ISSUE_CACHE_SIZE = int(os.environ.get('ISSUE_CACHE_SIZE', 10000))
+        self.ISSUE_CACHE_TTL = float(os.environ.get('ISSUE_CACHE_TTL', 60))
+
+        # read timeout in seconds of mattermost calls and max number of in flight calls made from the websocket loop
+        self.MM_REQUEST_TIMEOUT = float(os.environ.get('MM_REQUEST_TIMEOUT', 10))
+        self.MM_OUTBOUND_CONCURRENCY = int(os.environ.get('MM_OUTBOUND_CONCURRENCY', 4))
+        # connect timeout and retries of idempotent reads to mattermost
+        self.MM_CONNECT_TIMEOUT = float(os.environ.get('MM_CONNECT_TIMEOUT', 3))
+        self.MM_RETRIES = int(os.environ.get('MM_RETRIES', 2))
+
+        # lock file electing the one process which consumes the mattermost websocket
+        self.WEBSOCKET_LOCK_FILE = os.environ.get(
+            'WEBSOCKET_LOCK_FILE', os.path.join(tempfile.gettempdir(), 'rm-mm-bridge-websocket.lock')
+        )
+        # create_at of the newest post seen by the consumer, shared with the worker taking over the lock
+        self.WEBSOCKET_CURSOR_FILE = os.environ.get(
+            'WEBSOCKET_CURSOR_FILE', os.path.join(tempfile.gettempdir(), 'rm-mm-bridge-websocket.cursor')
+        )
+        self.WEBSOCKET_CURSOR_SAVE_INTERVAL = float(os.environ.get('WEBSOCKET_CURSOR_SAVE_INTERVAL', 5))
+        # bounded queue of websocket events and number of handler tasks reading it.
+        # When the queue is full drop_oldest or drop_newest decides which event is lost
+        self.WEBSOCKET_QUEUE_SIZE = int(os.environ.get('WEBSOCKET_QUEUE_SIZE', 1000))
+        self.WEBSOCKET_WORKERS = int(os.environ.get('WEBSOCKET_WORKERS', 4))
+        self.WEBSOCKET_QUEUE_POLICY = os.environ.get('WEBSOCKET_QUEUE_POLICY', 'drop_oldest')
+        # posts rewritten at once while catching up after a websocket reconnect
+        self.WEBSOCKET_CATCH_UP_BATCH_SIZE = int(os.environ.get('WEBSOCKET_CATCH_UP_BATCH_SIZE', 20))
+        # ids of recently handled posts, a post seen again within SEEN_POSTS_TTL seconds is dropped
+        self.SEEN_POSTS_SIZE = int(os.environ.get('SEEN_POSTS_SIZE', 10000))
+        self.SEEN_POSTS_TTL = float(os.environ.get('SEEN_POSTS_TTL', 3600))
+
 
 class Dev(Conf):
     def __init__(self, filename='.dev.env'):
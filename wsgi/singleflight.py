@@ -0,0 +1,32 @@
+import threading
+from concurrent.futures import Future
+
+from wsgi import metrics
+
+
+class SingleFlight:
+    # concurrent calls with the same key wait for the first one and share its result or its error
+    def __init__(self, name: str):
+        self.name = name
+        self._lock = threading.Lock()
+        self._calls = {}
+
+    def do(self, key, func, *args, **kwargs):
+        with self._lock:
+            future = self._calls.get(key)
+            is_leader = future is None
+            if is_leader:
+                future = self._calls[key] = Future()
+
+        if not is_leader:
+            metrics.incr(f'{self.name}_shared')
+            return future.result()
+
+        try:
+            future.set_result(func(*args, **kwargs))
+        except BaseException as exp:
+            future.set_exception(exp)
+        finally:
+            with self._lock:
+                del self._calls[key]
+        return future.result()
@@ -0,0 +1,196 @@
+import asyncio, functools, logging, random, threading, time
+import httpx, requests
+
+from wsgi import metrics
+from wsgi.settings import envs
+
+CLOSED = 'closed'
+OPEN = 'open'
+HALF_OPEN = 'half_open'
+
+
+class UpstreamUnavailable(Exception):
+    # the breaker of the upstream is open and the call wasn't made, or the call failed with a network error,
+    # a timeout or a 5xx answer on its last attempt
+    def __init__(self, name: str):
+        super().__init__(f'{name} is unavailable')
+        self.name = name
+
+
+class CircuitBreaker:
+    # opens after failure_threshold failed calls in a row and rejects calls for reset_timeout seconds.
+    # Then one trial call is let through, its result closes the breaker or opens it again
+    def __init__(self, name: str, failure_threshold: int, reset_timeout: float):
+        self.name = name
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.failures = 0
+        self.opened_at = None
+        self._trial = False
+        self._lock = threading.Lock()
+        self._set_state(CLOSED)
+
+    def _set_state(self, state: str) -> None:
+        self.state = state
+        metrics.set_gauge(f'{self.name}_breaker', state)
+
+    def allow(self) -> bool:
+        with self._lock:
+            if self.state == CLOSED:
+                return True
+            if self.state == OPEN and time.monotonic() - self.opened_at >= self.reset_timeout:
+                self._set_state(HALF_OPEN)
+            if self.state == HALF_OPEN and not self._trial:
+                self._trial = True
+                return True
+            metrics.incr(f'{self.name}_rejected')
+            return False
+
+    def success(self) -> None:
+        with self._lock:
+            self.failures = 0
+            self._trial = False
+            if self.state != CLOSED:
+                self._set_state(CLOSED)
+
+    def failure(self) -> None:
+        with self._lock:
+            self.failures += 1
+            self._trial = False
+            if self.state == HALF_OPEN or (self.state == CLOSED and self.failures >= self.failure_threshold):
+                self.opened_at = time.monotonic()
+                self._set_state(OPEN)
+                metrics.incr(f'{self.name}_breaker_opened')
+                logging.error('%s breaker opened after %s failures', self.name, self.failures)
+
+
+def is_transient(exp: BaseException) -> bool:
+    # network errors, timeouts and 5xx answers, anything else is an answer of a healthy upstream
+    if isinstance(exp, httpx.HTTPStatusError):
+        return exp.response.status_code >= 500
+    return isinstance(exp, (requests.ConnectionError, requests.Timeout, httpx.TransportError))
+
+
+def is_failed_response(result) -> bool:
+    return getattr(result, 'status_code', 0) >= 500
+
+
+class Upstream:
+    # timeouts, jittered retries of idempotent calls and a circuit breaker for one upstream service
+    def __init__(self, name: str, connect_timeout: float, read_timeout: float, retries: int, backoff: float,
+                 retry_budget: float, failure_threshold: int, reset_timeout: float):
+        self.name = name
+        self.connect_timeout = connect_timeout
+        self.read_timeout = read_timeout
+        self.retries = retries
+        self.backoff = backoff
+        self.retry_budget = retry_budget
+        self.breaker = CircuitBreaker(name, failure_threshold, reset_timeout)
+
+    @property
+    def timeout(self) -> tuple:
+        # (connect, read) as requests takes it
+        return self.connect_timeout, self.read_timeout
+
+    @property
+    def httpx_timeout(self) -> httpx.Timeout:
+        return httpx.Timeout(self.read_timeout, connect=self.connect_timeout)
+
+    @property
+    def max_call_time(self) -> float:
+        # longest time one call takes with its retries, a retry is only made when it ends within the budget
+        return max(self.retry_budget, self.connect_timeout + self.read_timeout)
+
+    def _attempts(self, idempotent: bool) -> int:
+        return self.retries + 1 if idempotent else 1
+
+    def _next_delay(self, attempt: int, attempts: int, deadline: float):
+        # exponential backoff with full jitter, so retries of many workers don't arrive together.
+        # None when no attempt is left or the next one could run past the retry budget of the call
+        if attempt + 1 >= attempts:
+            return None
+        delay = random.uniform(0, self.backoff * 2 ** attempt)
+        if time.monotonic() + delay + self.connect_timeout + self.read_timeout > deadline:
+            return None
+        return delay
+
+    def _check(self, result, exp, delay) -> bool:
+        # True when the call should be retried. The breaker records the outcome of the whole call
+        # once, the retries of one call are not several failures in a row
+        failed = is_transient(exp) if exp is not None else is_failed_response(result)
+        if not failed:
+            self.breaker.success()
+            return False
+        if delay is not None:
+            metrics.incr(f'{self.name}_retries')
+            return True
+        self.breaker.failure()
+        logging.error('%s call failed: %s', self.name, exp if exp is not None else f'status {result.status_code}')
+        raise UpstreamUnavailable(self.name) from exp
+
+    def call(self, func, *args, idempotent: bool = False, **kwargs):
+        if not self.breaker.allow():
+            raise UpstreamUnavailable(self.name)
+        attempts = self._attempts(idempotent)
+        deadline = time.monotonic() + self.retry_budget
+        for attempt in range(attempts):
+            try:
+                result = func(*args, **kwargs)
+            except Exception as exp:
+                delay = self._next_delay(attempt, attempts, deadline)
+                if not self._check(None, exp, delay):
+                    raise
+            else:
+                delay = self._next_delay(attempt, attempts, deadline)
+                if not self._check(result, None, delay):
+                    return result
+            time.sleep(delay)
+
+    async def call_async(self, func, *args, idempotent: bool = False, **kwargs):
+        if not self.breaker.allow():
+            raise UpstreamUnavailable(self.name)
+        attempts = self._attempts(idempotent)
+        deadline = time.monotonic() + self.retry_budget
+        for attempt in range(attempts):
+            try:
+                result = await func(*args, **kwargs)
+            except Exception as exp:
+                delay = self._next_delay(attempt, attempts, deadline)
+                if not self._check(None, exp, delay):
+                    raise
+            else:
+                delay = self._next_delay(attempt, attempts, deadline)
+                if not self._check(result, None, delay):
+                    return result
+            await asyncio.sleep(delay)
+
+    def guard(self, idempotent: bool = False):
+        def decorator(func):
+            @functools.wraps(func)
+            def wrapper(*args, **kwargs):
+                return self.call(func, *args, idempotent=idempotent, **kwargs)
+            return wrapper
+        return decorator
+
+
+redmine_upstream = Upstream(
+    'redmine',
+    connect_timeout=envs.REDMINE_CONNECT_TIMEOUT,
+    read_timeout=envs.REDMINE_READ_TIMEOUT,
+    retries=envs.REDMINE_RETRIES,
+    backoff=envs.RETRY_BACKOFF,
+    retry_budget=envs.RETRY_BUDGET,
+    failure_threshold=envs.BREAKER_FAILURE_THRESHOLD,
+    reset_timeout=envs.BREAKER_RESET_TIMEOUT,
+)
+
+mattermost_upstream = Upstream(
+    'mattermost',
+    connect_timeout=envs.MM_CONNECT_TIMEOUT,
+    read_timeout=envs.MM_REQUEST_TIMEOUT,
+    retries=envs.MM_RETRIES,
+    backoff=envs.RETRY_BACKOFF,
+    retry_budget=envs.RETRY_BUDGET,
+    failure_threshold=envs.BREAKER_FAILURE_THRESHOLD,
+    reset_timeout=envs.BREAKER_RESET_TIMEOUT,
+)
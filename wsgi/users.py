@@ -0,0 +1,23 @@
+from wsgi.metadata import RedmineMetadata
+from wsgi.redmine_session import redmine_client
+from wsgi.settings import envs
+
+USER_STATUS_ACTIVE = 1
+
+
+def load_user_logins() -> dict:
+    # status='' returns active, registered and locked users. Without limit python-redmine reads
+    # every user, 100 per request
+    redmine = redmine_client()
+    users = redmine.user.filter(status='')
+    return {u.login: (u.id, f'{u.firstname} {u.lastname}', u.status) for u in users}
+
+
+# redmine login -> (id, full name, status) of every redmine user
+user_directory = RedmineMetadata(envs.USER_DIRECTORY_REFRESH_INTERVAL, loaders={'logins': load_user_logins})
+
+
+def find_user(login_rm: str):
+    if user_directory.interval <= 0:
+        return None
+    return user_directory.get('logins').get(login_rm)
@@ -26,6 +26,13 @@ def invalid_estimated_time(t: str) -> dict:
     }
 
 
+def upstream_unavailable(name: str) -> dict:
+    return {
+        'type': 'error',
+        'text': f'# {name.title()} is not available right now. Please try again in a minute.'
+    }
+
+
 def no_rm_access_token() -> dict:
     return {
         'type': 'error',
@@ -68,6 +75,20 @@ def invalid_input_data() -> dict:
     }
 
 
+def outdated_form() -> dict:
+    return {
+        'type': 'error',
+        'text': '# Trackers, statuses or priorities were changed in redmine. Open the form again.'
+    }
+
+
+def invalid_filter(name: str, value: str) -> dict:
+    return {
+        'type': 'error',
+        'text': f'# Invalid value `{value}` for filter {name}'
+    }
+
+
 def long_subject() -> dict:
     return {
         'type': 'error',
@@ -87,3 +108,10 @@ def no_tasks_by_you(author: str) -> dict:
         'type': 'error',
         'text': f'{author}, there are no tasks by you yet.'
     }
+
+
+def tasks_not_created(failed_lines: list) -> dict:
+    return {
+        'type': 'error',
+        'text': '\n'.join(['# No task was created in redmine.', *failed_lines])
+    }
@@ -0,0 +1,166 @@
+import asyncio, collections, fcntl, logging, os, re, threading, time
+
+from wsgi import metrics
+
+
+def wait_for_consumer_lock(path: str):
+    # blocks until this process owns the lock file, so only one gunicorn worker consumes websocket events.
+    # The OS drops the lock when the owner dies and a waiting worker takes over
+    lock_file = open(path, 'a')
+    fcntl.flock(lock_file, fcntl.LOCK_EX)
+    logging.info('websocket consumer lock %s acquired by pid %s', path, os.getpid())
+    return lock_file
+
+
+class EventQueue:
+    # bounded queue between the websocket reader and a pool of handler tasks.
+    # When the queue is full the policy drops the oldest waiting event or the new one
+    policies = ('drop_oldest', 'drop_newest')
+
+    def __init__(self, handler, maxsize: int, workers: int, policy: str, on_drop=None):
+        if policy not in self.policies:
+            raise ValueError(f'unknown websocket queue policy {policy!r}, expected one of {self.policies}')
+        self.handler = handler
+        self.maxsize = maxsize
+        self.workers = workers
+        self.policy = policy
+        self.on_drop = on_drop
+        self._queue = None
+        self._tasks = []
+
+    async def put(self, message: str, context=None) -> None:
+        # context goes to the handler along with the message.
+        # The queue and the workers belong to the loop of the websocket thread, so create them lazily there
+        if self._queue is None:
+            self._queue = asyncio.Queue(self.maxsize)
+            self._tasks = [asyncio.ensure_future(self._work()) for _ in range(self.workers)]
+
+        if self._queue.full():
+            metrics.incr('websocket_events_dropped')
+            if self.policy == 'drop_newest':
+                self._dropped(message, context)
+                return
+            _, dropped_message, dropped_context = self._queue.get_nowait()
+            self._queue.task_done()
+            self._dropped(dropped_message, dropped_context)
+
+        self._queue.put_nowait((time.monotonic(), message, context))
+        metrics.set_gauge('websocket_queue_length', self._queue.qsize())
+
+    def _dropped(self, message: str, context) -> None:
+        if self.on_drop is not None:
+            self.on_drop(message, context)
+
+    async def _work(self) -> None:
+        while True:
+            enqueued_at, message, context = await self._queue.get()
+            metrics.set_gauge('websocket_queue_length', self._queue.qsize())
+            metrics.set_gauge('websocket_event_age_seconds', round(time.monotonic() - enqueued_at, 3))
+            try:
+                await self.handler(message, context)
+            except Exception:
+                logging.exception('websocket event handler failed')
+            finally:
+                self._queue.task_done()
+
+
+# create_at of the post inside the raw posted event, the post is a json string in the event json
+POST_CREATE_AT_RE = re.compile(r'create_at\\?":\s*(\d+)')
+
+
+def raw_post_create_at(message: str):
+    match = POST_CREATE_AT_RE.search(message)
+    return int(match.group(1)) if match else None
+
+
+class PostCursor:
+    # create_at (unix ms) up to which every post was handled, the catch-up after a reconnect starts from it.
+    # Posts waiting in the queue hold it back. A post which was dropped from the queue or failed holds it
+    # back until the next catch-up has run. A thread saves it to a file every save_interval seconds, so the
+    # worker which takes over the consumer lock catches up from where the previous consumer stopped.
+    # Everything but the saving runs on the loop of the websocket thread
+    def __init__(self, path: str, save_interval: float):
+        self.path = path
+        self.save_interval = save_interval
+        self.last_post_at = int(time.time() * 1000)
+        self._handled_at = self.last_post_at
+        self._pending = collections.Counter()
+        self._lost_at = None
+        self._lost_generation = 0
+        self._saved_at = None
+        self._thread = None
+
+    def load(self) -> None:
+        # called by the consumer after it got the lock, no file means the first start
+        try:
+            with open(self.path) as f:
+                self.last_post_at = self._handled_at = int(f.read())
+            logging.info('websocket post cursor %s loaded from %s', self.last_post_at, self.path)
+        except (OSError, ValueError):
+            pass
+        self._saved_at = self.last_post_at
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._save_forever, name='websocket_post_cursor', daemon=True)
+            self._thread.start()
+
+    def track(self, post_at: int) -> None:
+        # the post was queued
+        self._pending[post_at] += 1
+
+    def handled(self, post_at: int, tracked: bool = True) -> None:
+        # the post was handled, or the prefilter found nothing to do in it
+        if tracked:
+            self._release(post_at)
+        self._handled_at = max(self._handled_at, post_at)
+        self._move()
+
+    def lost(self, post_at: int, tracked: bool = True) -> None:
+        # the post was dropped from the queue or its handling failed, the next catch-up fetches it again
+        if tracked:
+            self._release(post_at)
+        self._lost_at = post_at if self._lost_at is None else min(self._lost_at, post_at)
+        self._lost_generation += 1
+        self._move()
+
+    def catch_up_start(self) -> tuple:
+        # (since, generation), taken when the hello event arrives
+        return self.last_post_at, self._lost_generation
+
+    def caught_up(self, generation: int) -> None:
+        # posts lost before the catch-up started were fetched by it
+        if generation == self._lost_generation:
+            self._lost_at = None
+            self._move()
+
+    def _release(self, post_at: int) -> None:
+        self._pending[post_at] -= 1
+        if self._pending[post_at] <= 0:
+            del self._pending[post_at]
+
+    def _move(self) -> None:
+        safe_at = self._handled_at
+        if self._pending:
+            safe_at = min(safe_at, min(self._pending) - 1)
+        if self._lost_at is not None:
+            safe_at = min(safe_at, self._lost_at - 1)
+        if safe_at > self.last_post_at:
+            self.last_post_at = safe_at
+
+    def save(self) -> None:
+        post_at = self.last_post_at
+        if post_at == self._saved_at:
+            return
+        tmp_path = f'{self.path}.{os.getpid()}'
+        try:
+            with open(tmp_path, 'w') as f:
+                f.write(str(post_at))
+            os.replace(tmp_path, self.path)
+        except OSError:
+            logging.exception('saving websocket post cursor to %s failed', self.path)
+            return
+        self._saved_at = post_at
+
+    def _save_forever(self) -> None:
+        while True:
+            time.sleep(self.save_interval)
+            self.save()